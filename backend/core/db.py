@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.backends.signals import connection_created
+
+
+class ConnectionStats:
+    """Counts physical connections opened per alias, so setup churn is visible without a pool."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.created = {}
+        self.started = time.time()
+
+    def record(self, sender, connection, **kwargs):
+        with self.lock:
+            self.created[connection.alias] = self.created.get(connection.alias, 0) + 1
+
+    def snapshot(self):
+        uptime = time.time() - self.started
+        with self.lock:
+            created = dict(self.created)
+        return {alias: {'created': count, 'created_per_minute': round(count * 60 / uptime, 2)}
+                for alias, count in created.items()}
+
+
+connection_stats = ConnectionStats()
+connection_created.connect(connection_stats.record, dispatch_uid='core.db.connection_stats')
+
+
+def pool_stats():
+    """
+    Per alias: psycopg pool statistics (size, available, requests_waiting, requests_wait_ms, ...)
+    when pooling is on, otherwise the persistent-connection settings and how often we connect.
+    """
+    created = connection_stats.snapshot()
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            stats[alias] = {'mode': 'pool', **pool.get_stats()}
+        else:
+            stats[alias] = {
+                'mode': 'persistent' if connection.settings_dict.get('CONN_MAX_AGE') else 'off',
+                'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+                'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+            }
+        stats[alias].update(created.get(alias, {'created': 0, 'created_per_minute': 0}))
+        if alias in replica_health.lag:
+            stats[alias]['replica_lag_seconds'] = replica_health.lag[alias]
+    return stats
+
+
+REPLICA_DEFAULTS = {
+    'MAX_LAG_SECONDS': 5,           # replicas further behind than this are skipped
+    'CHECK_INTERVAL': 5,            # seconds between lag probes of one replica, per process
+    'READ_AFTER_WRITE_SECONDS': 10, # primary-only window after a client's own write; keep >= MAX_LAG_SECONDS + CHECK_INTERVAL
+    'PIN_COOKIE': 'db_primary',     # set on a client's successful writes by core.middleware.ReadAfterWriteMiddleware
+}
+
+# PostgreSQL standby: seconds since the last replayed transaction, 0 when fully caught up
+# (an idle primary would otherwise look like it lags). NULL on a server that is not a standby.
+POSTGRESQL_LAG_SQL = '''
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+'''
+
+_pinned_alias = ContextVar('pinned_db_alias', default=None)
+
+
+def replica_setting(name):
+    return getattr(settings, 'DATABASE_REPLICAS', {}).get(name, REPLICA_DEFAULTS[name])
+
+
+def replica_aliases():
+    return [alias for alias, options in settings.DATABASES.items() if options.get('REPLICA')]
+
+
+def measure_lag(alias):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(POSTGRESQL_LAG_SQL)
+            lag = cursor.fetchone()[0]
+            return float(lag or 0)
+        # no replication to inspect (e.g. a copied SQLite file): only check it answers
+        cursor.execute('SELECT 1')
+        return 0.0
+
+
+class ReplicaHealth:
+    """Per-process view of replica lag, refreshed at most every CHECK_INTERVAL seconds."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+        self.lag = {}   #alias -> seconds, None when the replica is unreachable
+
+    def usable(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            due = now - self.checked.get(alias, float('-inf')) >= replica_setting('CHECK_INTERVAL')
+            if due:
+                self.checked[alias] = now   #other threads keep the previous verdict meanwhile
+        if due:
+            self.check(alias)
+        lag = self.lag.get(alias)
+        return lag is not None and lag <= replica_setting('MAX_LAG_SECONDS')
+
+    def check(self, alias):
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError:
+            lag = None
+            connections[alias].close()
+        self.lag[alias] = lag
+
+    def pick(self):
+        usable = [alias for alias in replica_aliases() if self.usable(alias)]
+        return random.choice(usable) if usable else None
+
+
+replica_health = ReplicaHealth()
+
+
+def pinned_database():
+    """The replica alias reads are pinned to in this context, or None for the primary."""
+    return _pinned_alias.get()
+
+
+def wrote_recently(request):
+    """True while the client's read-after-write cookie (see ReadAfterWriteMiddleware) is alive."""
+    return replica_setting('PIN_COOKIE') in request.COOKIES
+
+
+@contextmanager
+def pin_database(alias):
+    """Route every read in this context to `alias` (None means the primary)."""
+    token = _pinned_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _pinned_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to the primary unless the current request
+    pinned a replica (store.replicas.ReplicaReadMixin), and never to a replica from
+    inside a transaction on the primary, so read-modify-write code sees its own rows.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _pinned_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
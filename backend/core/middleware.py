@@ -0,0 +1,212 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .db import connection_stats, replica_aliases, replica_setting  # noqa: F401  (connection_stats registers the connection_created counter at startup)
+
+logger = logging.getLogger('core.sql')
+
+DEFAULTS = {
+    'SAMPLE_RATE': 1.0,          # fraction of requests instrumented
+    'SLOW_QUERY_MS': 100,        # statements slower than this are logged
+    'DUPLICATE_THRESHOLD': 5,    # same fingerprint this many times in one request = likely N+1
+    'TOP_N': 3,                  # slowest statements kept per request
+}
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def sql_setting(name):
+    return getattr(settings, 'SQL_INSTRUMENTATION', {}).get(name, DEFAULTS[name])
+
+
+def fingerprint(sql):
+    # parameters are already placeholders; only collapse variable-length IN lists
+    return IN_LIST.sub('IN (...)', WHITESPACE.sub(' ', sql))
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.slowest = []   #(ms, sql)
+        self.top_n = sql_setting('TOP_N')
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[fingerprint(sql)] += 1
+            if len(self.slowest) < self.top_n or elapsed > self.slowest[-1][0]:
+                self.slowest = sorted(self.slowest + [(elapsed, sql)], reverse=True)[:self.top_n]
+
+    def duplicates(self):
+        threshold = sql_setting('DUPLICATE_THRESHOLD')
+        return {sql: count for sql, count in self.fingerprints.items() if count >= threshold}
+
+
+class SQLMetrics:
+    """Per (view, action) totals since process start, served by core.views.sql_metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(lambda: {'requests': 0, 'queries': 0, 'db_ms': 0.0, 'n_plus_one': 0})
+
+    def record(self, view, stats):
+        with self.lock:
+            totals = self.views[view]
+            totals['requests'] += 1
+            totals['queries'] += stats.count
+            totals['db_ms'] += stats.duration
+            totals['n_plus_one'] += bool(stats.duplicates())
+
+    def snapshot(self):
+        with self.lock:
+            return {view: dict(totals) for view, totals in self.views.items()}
+
+
+metrics = SQLMetrics()
+
+
+# the QueryStats of the request in progress; sync_to_async copies it into worker threads
+current_stats = ContextVar('sql_instrumentation_stats', default=None)
+
+
+def record(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_recorder():
+    """
+    Leave `record` on this thread's connections. Connections are per thread, and under
+    ASGI the ORM runs in sync_to_async worker threads, so call this in the thread that
+    runs the request's queries.
+    """
+    for connection in connections.all():
+        if record not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, record)   #first, so execute_wrapper()'s pop() never takes it
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'cls', match.func)
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view.__module__}.{view.__name__}.{action}'
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Times every query of a sampled share of requests, in whichever thread runs it, and
+    reports query count and DB time as a Server-Timing header, logs slow statements and
+    repeated fingerprints (N+1), and feeds `metrics`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= sql_setting('SAMPLE_RATE'):
+            return self.get_response(request)
+
+        install_recorder()
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        if random.random() >= sql_setting('SAMPLE_RATE'):
+            return await self.get_response(request)
+
+        await sync_to_async(install_recorder)()   #runs in the thread this request's ORM calls run in
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        view = view_name(request)
+        metrics.record(view, stats)
+        response['Server-Timing'] = f'db;dur={stats.duration:.1f};desc="{stats.count} queries"'
+        self.log(request, view, stats)
+        return response
+
+    def log(self, request, view, stats):
+        slow = [(ms, sql) for ms, sql in stats.slowest if ms >= sql_setting('SLOW_QUERY_MS')]
+        duplicates = stats.duplicates()
+        if not slow and not duplicates:
+            return
+        logger.warning(json.dumps({
+            'path': request.path,
+            'view': view,
+            'queries': stats.count,
+            'db_ms': round(stats.duration, 1),
+            'slow': [{'ms': round(ms, 1), 'sql': sql} for ms, sql in slow],
+            'duplicates': duplicates,
+        }))
+
+
+class ReadAfterWriteMiddleware:
+    """
+    After a successful unsafe request, sets a short-lived cookie that keeps this client's
+    reads on the primary (store.replicas) until the replicas have caught up with its
+    write. Other clients keep reading from replicas. Does nothing without replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and replica_aliases():
+            response.set_cookie(
+                replica_setting('PIN_COOKIE'), '1',
+                max_age=replica_setting('READ_AFTER_WRITE_SECONDS'), httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,67 @@
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:   #optional: without it both classes behave exactly like DRF's
+    orjson = None
+
+
+if orjson is not None:
+    # OPT_UTC_Z matches DRF's encoder, which writes "+00:00" as "Z"; native datetimes differ from it only
+    # in offsets with seconds (historical LMT zones), which orjson rounds to the minute
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+# where orjson writes a float exactly like repr(); outside it, "1e16" for "1e+16"
+NATIVE_FLOAT_RANGE = (1e-4, 1e16)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer backed by orjson. UUIDs, dates and datetimes are encoded natively and
+    Decimals become floats in `default`, as DRF's JSONEncoder writes them; lazy strings and
+    anything rarer go through that encoder. Output is byte-for-byte the same as the default
+    compact, unicode renderer. Indented output is left to DRF.
+    """
+    encoder = JSONEncoder()
+
+    def default(self, obj):
+        if type(obj) is Decimal:   #every price; skips the encoder's isinstance chain
+            value = float(obj)
+            if NATIVE_FLOAT_RANGE[0] <= abs(value) < NATIVE_FLOAT_RANGE[1] or value == 0:
+                return value
+            return orjson.Fragment(json.dumps(value, allow_nan=not self.strict).encode())
+        return self.encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if not (self.compact and not self.ensure_ascii):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+        # same escaping DRF applies: these are valid JSON but not valid JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            raw = stream.read() if stream is not None else b''
+            if encoding.lower().replace('-', '') != 'utf8':
+                raw = raw.decode(encoding).encode('utf-8')
+            return orjson.loads(raw)
+        except (ValueError, UnicodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
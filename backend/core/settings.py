@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework',
     'djoser',
@@ -51,8 +53,18 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.SQLInstrumentationMiddleware',
+    'core.middleware.ReadAfterWriteMiddleware',
 ]
 
+# see core.middleware.DEFAULTS; lower SAMPLE_RATE under heavy load
+SQL_INSTRUMENTATION = {
+    'SAMPLE_RATE': 1.0,
+    'SLOW_QUERY_MS': 100,
+    'DUPLICATE_THRESHOLD': 5,
+    'TOP_N': 3,
+}
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -89,6 +101,61 @@ DATABASES = {
     }
 }
 
+# STORE_DB_POOL picks how PostgreSQL connections are reused:
+#   persistent - one long-lived connection per worker thread, checked before reuse (fine for WSGI)
+#   pool       - psycopg 3 in-process pool shared by all threads; use this under ASGI
+#   off        - a new connection per request
+DB_POOL_MODE = os.environ.get('STORE_DB_POOL', 'persistent')
+if DB_POOL_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('STORE_DB_CONN_MAX_AGE', 600))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_POOL_MODE == 'pool':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('STORE_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('STORE_DB_POOL_MAX', 20)),
+            'timeout': float(os.environ.get('STORE_DB_POOL_TIMEOUT', 10)),
+        },
+    }
+
+# STORE_DATABASE=sqlite runs everything (e.g. manage.py benchmark_store) against a local SQLite file
+if os.environ.get('STORE_DATABASE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# store_review_prod_date_idx INCLUDEs last_update so PostgreSQL answers review ETags from the index;
+# SQLite has no covering columns and builds it as a plain (product, date) index, which is all it needs
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+# STORE_DB_REPLICAS adds read replicas as aliases replica_1, replica_2, ... (see core.db.ReplicaRouter).
+# Comma-separated; each entry is [host[:port]/]name with the rest copied from 'default'.
+# Locally, two SQLite files: STORE_DATABASE=sqlite STORE_DB_REPLICAS=db.replica.sqlite3, after
+# copying db.sqlite3 to db.replica.sqlite3 (there is no replication; copy again to "catch up").
+for number, entry in enumerate(filter(None, os.environ.get('STORE_DB_REPLICAS', '').split(',')), start=1):
+    replica = {**DATABASES['default'], 'REPLICA': True, 'TEST': {'MIRROR': 'default'}}
+    location, _, name = entry.strip().rpartition('/')
+    if replica['ENGINE'] == 'django.db.backends.sqlite3':
+        replica['NAME'] = BASE_DIR / name
+    else:
+        replica['NAME'] = name
+        if location:
+            host, _, port = location.partition(':')
+            replica['HOST'], replica['PORT'] = host, port or replica['PORT']
+    DATABASES[f'replica_{number}'] = replica
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+# see core.db.REPLICA_DEFAULTS
+DATABASE_REPLICAS = {
+    'MAX_LAG_SECONDS': 5,
+    'CHECK_INTERVAL': 5,
+    'READ_AFTER_WRITE_SECONDS': 10,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,8 +202,17 @@ AUTH_USER_MODEL =   'store.User'
 
 REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING' : False,
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'store.authentication.CachedJWTAuthentication',
     ),
 
     # 'DEFAULT_PAGINATION_CLASS' : 'rest_framework.pagination.PageNumberPagination',
@@ -147,6 +223,39 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES' : ('JWT',),
 }
 
+# Any Django cache backend works here: LocMemCache, FileBasedCache, or
+# django.core.cache.backends.redis.RedisCache (also fine for Redis-compatible servers).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# cache used for product/collection responses; entries are invalidated by version bumps,
+# the timeout only caps how long an orphaned entry lingers
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 600
+# re-read volatile fields (product inventory) on every cache hit: one query per hit, but
+# no stock that lags checkouts by up to CATALOG_CACHE_TIMEOUT (see store.caching)
+CATALOG_CACHE_REFRESH_VOLATILE_FIELDS = False
+
+# seconds a serialized cart stays cached (invalidated on every CartItem write); None disables it
+CART_CACHE_TIMEOUT = 300
+
+# CachedJWTAuthentication: seconds a resolved user stays cached (dropped on every user save),
+# and whether to fall back to a stateless TokenUser when the cache backend is down
+AUTH_USER_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'STATELESS_FALLBACK': False,
+}
+
+# carts without item activity for this long are removed by manage.py purge_expired_carts
+CART_EXPIRY_DAYS = 30
+
+# pending orders hold their inventory this long before release_expired_reservations returns it
+ORDER_RESERVATION_MINUTES = 30
+
 DJOSER = {
     'SERIALIZERS' : {
         'user_create' : 'store.serializers.UserCreateSerializer'
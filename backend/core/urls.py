@@ -16,6 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from . import views
 
 
 urlpatterns = [
@@ -23,4 +24,6 @@ urlpatterns = [
     path('store/', include('store.urls' ) ),
     path('auth/', include('djoser.urls' ) ),
      path('auth/', include('djoser.urls.jwt' ) ),
+    path('metrics/sql/', views.sql_metrics, name='sql-metrics'),
+    path('metrics/db-pool/', views.db_pool_metrics, name='db-pool-metrics'),
 ]
@@ -0,0 +1,15 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .db import pool_stats
+from .middleware import metrics
+
+
+@staff_member_required
+def sql_metrics(request):
+    return JsonResponse(metrics.snapshot())
+
+
+@staff_member_required
+def db_pool_metrics(request):
+    return JsonResponse(pool_stats())
@@ -1,3 +1,162 @@
 from django.contrib import admin
+from django.db.models import (
+    Case, CharField, Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
 
-# Register your models here.
+from .models import Collection, Customer, Order, OrderItem, Product, Review
+from .pagination import EstimatedCountPaginator
+
+LOW_INVENTORY = 10
+PRICE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+def per_order(queryset, aggregate, output_field):
+    """Correlated subquery: `aggregate` over one order's items, evaluated only for the rows on the page."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(order=OuterRef('pk')).order_by().values('order')
+            .annotate(value=aggregate).values('value'),
+            output_field=output_field,
+        ),
+        Value(0, output_field=output_field),
+    )
+
+
+class StoreAdmin(admin.ModelAdmin):
+    """
+    Defaults for tables that grow to millions of rows: estimated page counts, no
+    second unfiltered COUNT(*) next to filtered results, newest rows first (a pk
+    index scan), and no model Meta.ordering joins.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-pk']
+
+
+class InventoryFilter(admin.SimpleListFilter):
+    title = 'inventory'
+    parameter_name = 'inventory'
+
+    def lookups(self, request, model_admin):
+        return [('out', 'Out of stock'), ('low', 'Low'), ('ok', 'OK')]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'out':
+            return queryset.filter(inventory__lte=0)
+        if self.value() == 'low':
+            return queryset.filter(inventory__gt=0, inventory__lt=LOW_INVENTORY)
+        if self.value() == 'ok':
+            return queryset.filter(inventory__gte=LOW_INVENTORY)
+        return queryset
+
+
+@admin.register(Collection)
+class CollectionAdmin(StoreAdmin):
+    list_display = ['title', 'products_count', 'featured_product', 'last_update']
+    list_select_related = ['featured_product']
+    autocomplete_fields = ['featured_product']
+    search_fields = ['title__istartswith']
+
+
+@admin.register(Product)
+class ProductAdmin(StoreAdmin):
+    list_display = ['title', 'unit_price', 'effective_price', 'inventory', 'inventory_status', 'collection',
+                    'reviews_count', 'last_update']
+    list_filter = [InventoryFilter]
+    list_select_related = ['collection']
+    list_per_page = 50
+    autocomplete_fields = ['collection']
+    filter_horizontal = ['promotions']
+    prepopulated_fields = {'slug': ['title']}
+    search_fields = ['title__istartswith', 'slug__exact']
+    readonly_fields = ['effective_price', 'reviews_count', 'last_review_date']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_vector').annotate(
+            inventory_status=Case(
+                When(inventory__lte=0, then=Value('Out of stock')),
+                When(inventory__lt=LOW_INVENTORY, then=Value('Low')),
+                default=Value('OK'),
+                output_field=CharField(),
+            )
+        )
+
+    @admin.display(ordering='inventory')
+    def inventory_status(self, product):
+        return product.inventory_status
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    autocomplete_fields = ['product']
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
+
+@admin.register(Order)
+class OrderAdmin(StoreAdmin):
+    list_display = ['id', 'placed_at', 'payment_status', 'customer', 'items_count', 'total_price']
+    list_filter = ['payment_status']
+    list_select_related = ['customer__user']
+    autocomplete_fields = ['customer']
+    search_fields = ['customer__user__email__exact']
+    inlines = [OrderItemInline]
+
+    def get_queryset(self, request):
+        items = OrderItem.objects.all()
+        return super().get_queryset(request).annotate(
+            items_count=per_order(items, Sum('quantity'), IntegerField()),
+            total_price=per_order(items, Sum(F('quantity') * F('unit_price'), output_field=PRICE_FIELD), PRICE_FIELD),
+        )
+
+    @admin.display(ordering='items_count')
+    def items_count(self, order):
+        return order.items_count
+
+    @admin.display(ordering='total_price')
+    def total_price(self, order):
+        return order.total_price
+
+
+@admin.register(Customer)
+class CustomerAdmin(StoreAdmin):
+    list_display = ['first_name', 'last_name', 'email', 'membership', 'orders_count']
+    list_editable = ['membership']
+    list_filter = ['membership']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    search_fields = ['user__first_name__istartswith', 'user__last_name__istartswith', 'user__email__exact']
+
+    def get_queryset(self, request):
+        # also used by autocomplete on OrderAdmin; __str__ reads user
+        orders = Order.objects.filter(customer=OuterRef('pk')).order_by().values('customer') \
+            .annotate(count=Count('pk')).values('count')
+        return super().get_queryset(request).select_related('user') \
+            .annotate(orders_count=Coalesce(Subquery(orders), 0))
+
+    @admin.display(ordering='user__first_name')
+    def first_name(self, customer):
+        return customer.user.first_name
+
+    @admin.display(ordering='user__last_name')
+    def last_name(self, customer):
+        return customer.user.last_name
+
+    @admin.display(ordering='user__email')
+    def email(self, customer):
+        return customer.user.email
+
+    @admin.display(ordering='orders_count')
+    def orders_count(self, customer):
+        return customer.orders_count
+
+
+@admin.register(Review)
+class ReviewAdmin(StoreAdmin):
+    list_display = ['name', 'product', 'date']
+    list_select_related = ['product']
+    autocomplete_fields = ['product']
+    search_fields = ['name__istartswith']
@@ -0,0 +1,140 @@
+"""
+Async-native read endpoints for the catalog and carts, served under /store/async/.
+
+DRF viewsets are sync-only, so under ASGI each request to them is bridged through
+sync_to_async onto one thread. These views use the async ORM (aiterator / aget /
+acount) end to end and build the same JSON the DRF endpoints return from .values()
+rows, without going through serializers.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.utils.http import urlencode
+
+from .carts import cart_items_queryset, carts_with_totals
+from .filters import ProductFilter
+from .models import Cart, Collection, Product
+from .pagination import DefaultPagination
+from .search import ProductSearchFilter, parse_search_terms, search_products
+
+PRODUCT_FIELDS = ['id', 'title', 'slug', 'description', 'unit_price', 'effective_price', 'inventory', 'collection',
+                  'reviews_count', 'last_review_date']
+PRODUCT_ORDERING = ['unit_price', '-unit_price', 'effective_price', '-effective_price', 'last_update', '-last_update',
+                    'reviews_count', '-reviews_count']
+PRODUCT_SEARCH_FIELDS = ['title', 'description']
+PRODUCT_PARAMS = {*ProductFilter.base_filters, ProductSearchFilter.search_param, 'ordering', 'page',
+                  DefaultPagination.page_size_query_param}
+COLLECTION_FIELDS = ['id', 'title', 'products_count']
+
+
+def to_float(value):
+    return None if value is None else float(value)
+
+
+def product_row(row):
+    row['unit_price'] = float(row['unit_price'])
+    row['effective_price'] = to_float(row['effective_price'])
+    return row
+
+
+def filter_products(request):
+    """
+    The ProductViewSet list queryset for request.GET: ProductFilter, search, then
+    ordering. Returns (queryset, None), or (None, errors) for unknown parameters and
+    invalid filter values. Sync, since validating collection_id queries the database.
+    """
+    unknown = sorted(set(request.GET) - PRODUCT_PARAMS)
+    if unknown:
+        return None, {'error': f"Unsupported query parameter(s): {', '.join(unknown)}."}
+
+    filterset = ProductFilter(request.GET, queryset=Product.objects.all())
+    if not filterset.is_valid():
+        return None, filterset.errors
+    queryset = search_products(filterset.qs, parse_search_terms(request.GET.get(ProductSearchFilter.search_param, '')),
+                               PRODUCT_SEARCH_FIELDS)
+    ordering = [field for field in request.GET.get('ordering', '').split(',') if field in PRODUCT_ORDERING]
+    if ordering:   # replaces the search rank, as OrderingFilter does
+        queryset = queryset.order_by(*ordering)
+    return queryset.order_by(*queryset.query.order_by, 'id'), None
+
+
+def page_link(request, page):
+    params = request.GET.copy()
+    params['page'] = page
+    return request.build_absolute_uri(f'{request.path}?{urlencode(params, doseq=True)}')
+
+
+async def product_list(request):
+    queryset, errors = await sync_to_async(filter_products)(request)
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    paginator = DefaultPagination()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get(paginator.page_size_query_param, paginator.page_size)), 1),
+                        paginator.max_page_size)
+    except ValueError:
+        raise Http404('Invalid page.')
+
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if offset and offset >= count:
+        raise Http404('Invalid page.')
+    results = [product_row(row) async for row in queryset.values(*PRODUCT_FIELDS)[offset:offset + page_size]]
+    return JsonResponse({
+        'count': count,
+        'next': page_link(request, page + 1) if offset + page_size < count else None,
+        'previous': page_link(request, page - 1) if page > 1 else None,
+        'results': results,
+    })
+
+
+async def product_detail(request, pk):
+    try:
+        row = await Product.objects.values(*PRODUCT_FIELDS).aget(pk=pk)
+    except Product.DoesNotExist:
+        raise Http404('No Product matches the given query.')
+    return JsonResponse(product_row(row))
+
+
+async def collection_list(request):
+    rows = [row async for row in Collection.objects.values(*COLLECTION_FIELDS).order_by('id').aiterator()]
+    return JsonResponse(rows, safe=False)
+
+
+async def collection_detail(request, pk):
+    try:
+        row = await Collection.objects.values(*COLLECTION_FIELDS).aget(pk=pk)
+    except Collection.DoesNotExist:
+        raise Http404('No Collection matches the given query.')
+    return JsonResponse(row)
+
+
+async def cart_detail(request, pk):
+    try:
+        cart = await carts_with_totals().prefetch_related(None).values('id', 'total_price').aget(pk=pk)
+    except (Cart.DoesNotExist, ValidationError):
+        raise Http404('No Cart matches the given query.')
+
+    items = cart_items_queryset().filter(cart_id=cart['id']).order_by('id') \
+        .values('id', 'quantity', 'total_price', 'product_id', 'product__title', 'product__unit_price',
+                'product__effective_price')
+    return JsonResponse({
+        'id': str(cart['id']),
+        'items': [
+            {
+                'id': item['id'],
+                'product': {
+                    'id': item['product_id'],
+                    'title': item['product__title'],
+                    'unit_price': float(item['product__unit_price']),
+                    'effective_price': to_float(item['product__effective_price']),
+                },
+                'quantity': item['quantity'],
+                'total_price': to_float(item['total_price']),
+            }
+            async for item in items.aiterator()
+        ],
+        'total_price': float(cart['total_price']),
+    })
@@ -0,0 +1,85 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+
+def auth_cache_setting(name, default):
+    return getattr(settings, 'AUTH_USER_CACHE', {}).get(name, default)
+
+
+def user_cache_key(user_id):
+    return f'store:auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    caches[auth_cache_setting('ALIAS', 'default')].delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves request.user from the cache instead of
+    SELECTing the user on every request. Entries are dropped whenever the user is
+    saved or deleted (store.signals), which covers password changes and
+    deactivation; TIMEOUT bounds staleness from writes that bypass signals.
+
+    The cache holds the user's field values minus the password, plus the revoke
+    claim (an md5 of the password hash, as carried by tokens), so the is_active
+    and CHECK_REVOKE_TOKEN checks run on hits too. Cached users come back with the
+    password deferred: reading it or calling save() still behaves like a fresh load.
+
+    With STATELESS_FALLBACK, an unreachable cache backend yields a TokenUser built
+    from the token claims rather than sending every request to the database.
+    """
+
+    cached_fields_excluded = ('password',)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        cache = caches[auth_cache_setting('ALIAS', 'default')]
+        key = user_cache_key(user_id)
+        try:
+            cached = cache.get(key)
+        except Exception:
+            if not auth_cache_setting('STATELESS_FALLBACK', False):
+                raise
+            logger.warning('User cache unavailable, using stateless token user', exc_info=True)
+            return TokenUser(validated_token)
+
+        if cached is None:
+            # full checks (existence, is_active, token revocation) on every cache fill
+            user = super().get_user(validated_token)
+            cache.set(key, self.dump_user(user), auth_cache_setting('TIMEOUT', 300))
+            return user
+
+        values, revoke_claim = cached
+        user = self.load_user(values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != revoke_claim:
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def dump_user(self, user):
+        values = {
+            field.attname: getattr(user, field.attname)
+            for field in self.user_model._meta.concrete_fields
+            if field.attname not in self.cached_fields_excluded
+        }
+        return values, get_md5_hash_password(user.password)
+
+    def load_user(self, values):
+        # from_db marks the missing fields as deferred, like .defer('password')
+        return self.user_model.from_db(None, list(values), list(values.values()))
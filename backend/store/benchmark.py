@@ -0,0 +1,273 @@
+import itertools
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Cart, CartItem, Collection, Customer, Order, OrderItem, Product, Promotion, Review, User
+
+BATCH_SIZE = 5000
+
+
+def seed(products=100_000, collections=10_000, reviews_per_product=2, carts=100, cart_items=50, promotions=20,
+         customers=1_000, orders=5_000):
+    """
+    Bulk-insert a realistic catalog. Callers are expected to run this inside a
+    transaction they roll back (see the benchmark_store command).
+    """
+    rng = random.Random(42)
+    Collection.objects.bulk_create(
+        (Collection(title=f'Collection {i}') for i in range(collections)), batch_size=BATCH_SIZE)
+    collection_ids = list(Collection.objects.values_list('id', flat=True))
+
+    Promotion.objects.bulk_create(
+        Promotion(description=f'Promotion {i}', discount=rng.choice([0.05, 0.1, 0.2])) for i in range(promotions))
+    promotion_ids = list(Promotion.objects.values_list('id', flat=True))
+
+    Product.objects.bulk_create(
+        (
+            Product(
+                title=f'Product {i}',
+                slug=f'benchmark-product-{i}',
+                description='Lorem ipsum dolor sit amet ' * rng.randint(1, 20),
+                unit_price=Decimal(rng.randint(100, 99_999)) / 100,
+                inventory=rng.randint(0, 500),
+                collection_id=rng.choice(collection_ids),
+            )
+            for i in range(products)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    product_ids = list(Product.objects.values_list('id', flat=True))
+
+    Through = Product.promotions.through
+    Through.objects.bulk_create(
+        (Through(product_id=product_id, promotion_id=rng.choice(promotion_ids)) for product_id in product_ids[::10]),
+        batch_size=BATCH_SIZE,
+    )
+    Review.objects.bulk_create(
+        (
+            Review(product_id=product_id, name=f'Reviewer {n}', description='Great product.')
+            for product_id in product_ids[:products // 10]
+            for n in range(reviews_per_product)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    cart_objects = Cart.objects.bulk_create(Cart() for _ in range(carts))
+    CartItem.objects.bulk_create(
+        (
+            CartItem(cart=cart, product_id=product_id, quantity=rng.randint(1, 5))
+            for cart in cart_objects
+            for product_id in rng.sample(product_ids, cart_items)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    small_cart = Cart.objects.create()
+    CartItem.objects.create(cart=small_cart, product_id=product_ids[0], quantity=1)
+
+    names = ['Ann', 'Bob', 'Cleo', 'Dev', 'Eve', 'Finn', 'Gus', 'Hana', 'Ivo', 'Jo']
+    users = User.objects.bulk_create(
+        (
+            User(username=f'customer-{i}', email=f'customer-{i}@example.com', password='!',
+                 first_name=rng.choice(names), last_name=f'{rng.choice(names)}son')
+            for i in range(customers)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    customer_ids = [
+        customer.pk for customer in Customer.objects.bulk_create(
+            (Customer(user=user, phone='000') for user in users), batch_size=BATCH_SIZE)
+    ]
+    Order.objects.bulk_create(
+        (
+            Order(customer_id=rng.choice(customer_ids), payment_status=rng.choices('PCF', weights=(1, 8, 1))[0])
+            for _ in range(orders if customer_ids else 0)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    user = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark', is_staff=True)
+    customer = Customer.objects.create(user=user, phone='000')
+    Product.objects.filter(pk=product_ids[0]).update(inventory=1_000_000)   #orders-create checks it out every iteration
+    order = Order.objects.create(customer=customer)
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product_id=product_id, quantity=1, unit_price=1) for product_id in product_ids[:cart_items])
+
+    in_cart = set(CartItem.objects.filter(cart=cart_objects[0]).values_list('product_id', flat=True))
+    spare_product = next(product_id for product_id in product_ids[1:] if product_id not in in_cart)
+
+    return {
+        'product': product_ids[0],
+        'reviewed_product': product_ids[0],
+        'collection': collection_ids[0],
+        'review': Review.objects.filter(product_id=product_ids[0]).values_list('id', flat=True).first(),
+        'cart': cart_objects[0].pk,
+        'small_cart': small_cart.pk,
+        'cart_item': CartItem.objects.filter(cart=cart_objects[0]).values_list('id', flat=True).first(),
+        'customer': customer.pk,
+        'user': user.pk,
+        'order': order.pk,
+        'spare_product': spare_product,
+    }
+
+
+class Upload(dict):
+    """A multipart form body; every other body is sent as JSON."""
+
+
+def numbered(**fields):
+    """A body factory: '{}' in string values becomes the iteration number, so unique fields stay unique."""
+    counter = itertools.count()
+
+    def body():
+        number = next(counter)
+        return {key: value.format(number) if isinstance(value, str) else value for key, value in fields.items()}
+    return body
+
+
+def fresh(path, model, **fields):
+    """A path factory for deletes: each iteration creates its own row and gets its URL."""
+    values = numbered(**fields)
+    return lambda: path.format(model.objects.create(**values()).pk)
+
+
+def checkout_body(product):
+    """A body factory for checkouts: each iteration places an order from its own cart."""
+    def body():
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product_id=product, quantity=1)
+        return {'cart_id': str(cart.pk)}
+    return body
+
+
+def import_body(collection, rows=100):
+    """A body factory for the import route: an upload re-importing the same slugs every iteration."""
+    lines = ['title,slug,description,unit_price,inventory,collection_id']
+    lines += [f'Imported {i},benchmark-import-{i},,9.99,5,{collection}' for i in range(rows)]
+    content = '\r\n'.join(lines).encode()
+    return lambda: Upload(file=SimpleUploadedFile('products.csv', content), import_format='csv')
+
+
+def scenarios(ids):
+    """
+    (name, method, path, body, scaling group). Scenarios sharing a scaling group return
+    different amounts of data from the same code path and must run the same number of queries.
+    A callable path or body is called before each iteration, outside the measurement.
+    """
+    product, collection, cart = ids['product'], ids['collection'], ids['cart']
+    reviews = f"/store/products/{ids['reviewed_product']}/reviews/"
+    new_product = numbered(title='Benchmark', slug='benchmark-{}', unit_price=10, inventory=1, collection=collection)
+    return [
+        ('products-list', 'get', '/store/products/', None, 'products-list'),
+        ('products-list-100', 'get', '/store/products/?page_size=100', None, 'products-list'),
+        ('products-list-filtered', 'get', f'/store/products/?collection_id={collection}&unit_price__gt=10&ordering=-unit_price', None, None),
+        ('products-list-search', 'get', '/store/products/?search=product', None, None),
+        ('products-keyset', 'get', '/store/products/?cursor=&ordering=unit_price', None, 'products-keyset'),
+        ('products-keyset-100', 'get', '/store/products/?cursor=&ordering=unit_price&page_size=100', None, 'products-keyset'),
+        ('products-detail', 'get', f'/store/products/{product}/', None, None),
+        ('products-create', 'post', '/store/products/', new_product, None),
+        ('products-update', 'patch', f'/store/products/{product}/', {'title': 'Renamed'}, None),
+        ('products-delete', 'delete', fresh('/store/products/{}/', Product, title='Doomed', slug='doomed-{}', unit_price=1,
+                                            inventory=1, collection_id=collection), None, None),
+        ('products-export', 'get', f'/store/products/export/?collection_id={collection}', None, None),
+        ('products-import', 'post', '/store/products/import/', import_body(collection), None),
+        ('collections-list', 'get', '/store/collections/', None, None),
+        ('collections-detail', 'get', f'/store/collections/{collection}/', None, None),
+        ('collections-create', 'post', '/store/collections/', {'title': 'Benchmark'}, None),
+        ('collections-update', 'patch', f'/store/collections/{collection}/', {'title': 'Renamed'}, None),
+        ('collections-delete', 'delete', fresh('/store/collections/{}/', Collection, title='Doomed'), None, None),
+        ('product-reviews-list', 'get', reviews, None, None),
+        ('product-reviews-detail', 'get', f"{reviews}{ids['review']}/", None, None),
+        ('product-reviews-create', 'post', reviews, {'name': 'Bench', 'description': 'Fine.'}, None),
+        ('product-reviews-update', 'patch', f"{reviews}{ids['review']}/", {'description': 'Still fine.'}, None),
+        ('product-reviews-delete', 'delete',
+         fresh(reviews + '{}/', Review, product_id=ids['reviewed_product'], name='Doomed', description='-'), None, None),
+        ('carts-detail-1', 'get', f"/store/carts/{ids['small_cart']}/", None, 'carts-detail'),
+        ('carts-detail-50', 'get', f'/store/carts/{cart}/', None, 'carts-detail'),
+        ('carts-create', 'post', '/store/carts/', {}, None),
+        ('carts-delete', 'delete', fresh('/store/carts/{}/', Cart), None, None),
+        ('cart-items-list', 'get', f'/store/carts/{cart}/items/', None, None),
+        ('cart-items-detail', 'get', f"/store/carts/{cart}/items/{ids['cart_item']}/", None, None),
+        ('cart-items-create', 'post', f'/store/carts/{cart}/items/', {'product_id': product, 'quantity': 1}, None),
+        ('cart-items-bulk', 'post', f'/store/carts/{cart}/items/bulk/', [{'product_id': product, 'quantity': 1}] * 10, None),
+        ('cart-items-delete', 'delete',
+         fresh(f"/store/carts/{cart}/items/{{}}/", CartItem, cart_id=cart, product_id=ids['spare_product'], quantity=1), None, None),
+        ('customers-detail', 'get', f"/store/customers/{ids['customer']}/", None, None),
+        ('customers-update', 'patch', f"/store/customers/{ids['customer']}/", {'phone': '111'}, None),
+        ('orders-list', 'get', '/store/orders/', None, None),
+        ('orders-detail', 'get', f"/store/orders/{ids['order']}/", None, None),
+        ('orders-create', 'post', '/store/orders/', checkout_body(product), None),
+        ('async-products-list', 'get', '/store/async/products/', None, 'async-products-list'),
+        ('async-products-list-100', 'get', '/store/async/products/?page_size=100', None, 'async-products-list'),
+        ('async-products-detail', 'get', f'/store/async/products/{product}/', None, None),
+        ('async-collections-list', 'get', '/store/async/collections/', None, None),
+        ('async-collections-detail', 'get', f'/store/async/collections/{collection}/', None, None),
+        ('async-carts-detail-1', 'get', f"/store/async/carts/{ids['small_cart']}/", None, 'async-carts-detail'),
+        ('async-carts-detail-50', 'get', f'/store/async/carts/{cart}/', None, 'async-carts-detail'),
+        ('catalog-cache-stats', 'get', '/store/catalog-cache/stats/', None, None),
+        ('sql-metrics', 'get', '/metrics/sql/', None, None),
+        ('db-pool-metrics', 'get', '/metrics/db-pool/', None, None),
+    ]
+
+
+def run_scenario(client, method, path, body, iterations):
+    timings, queries, size, status_code = [], None, 0, None
+    for _ in range(iterations):
+        url = path() if callable(path) else path
+        data = body() if callable(body) else body
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            if method == 'get':
+                response = client.get(url)
+            elif isinstance(data, Upload):
+                response = getattr(client, method)(url, data)
+            else:
+                response = getattr(client, method)(url, data, content_type='application/json')
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(captured) if queries is None else max(queries, len(captured))
+        size, status_code = len(content), response.status_code
+
+    cuts = statistics.quantiles(timings, n=20) if len(timings) > 1 else timings * 19
+    return {
+        'status': status_code,
+        'queries': queries,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(cuts[18], 3),
+        'bytes': size,
+    }
+
+
+def run(ids, iterations=20):
+    # staff, so the import and stats routes answer too: a JWT for the API, a session for the metrics views
+    user = User.objects.get(pk=ids['user'])
+    client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(user)}')
+    client.force_login(user)
+    client.get('/store/orders/')   #fills the JWT user cache, which would otherwise charge the first scenario a query
+    results, groups = {}, {}
+    for name, method, path, body, group in scenarios(ids):
+        results[name] = {'path': path, **run_scenario(client, method, path, body, iterations)}
+        if group:
+            groups.setdefault(group, []).append(name)
+    return results, groups
+
+
+def compare(results, groups, baseline=None):
+    """Human-readable regressions: query counts that scale with result size or exceed the baseline."""
+    problems = []
+    for group, names in groups.items():
+        counts = {name: results[name]['queries'] for name in names}
+        if len(set(counts.values())) > 1:
+            problems.append(f'{group}: query count grows with result size {counts}')
+    for name, result in (baseline or {}).get('results', {}).items():
+        if name in results and results[name]['queries'] > result['queries']:
+            problems.append(f"{name}: {results[name]['queries']} queries, baseline {result['queries']}")
+    return problems
@@ -0,0 +1,157 @@
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from core.db import pinned_database, replica_setting
+
+VERSION_KEY = 'store:catalog:version'
+HITS_KEY = 'store:catalog:hits'
+MISSES_KEY = 'store:catalog:misses'
+WRITTEN_AT_KEY = 'store:catalog:written_at'
+
+
+def catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def catalog_version():
+    return catalog_cache().get_or_set(VERSION_KEY, 1, timeout=None)
+
+
+def bump_catalog_version():
+    """Orphan every cached catalog response; old entries simply age out of the backend."""
+    cache = catalog_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:   #key missing or evicted
+        cache.set(VERSION_KEY, 2, timeout=None)
+    cache.set(WRITTEN_AT_KEY, time.time(), timeout=None)
+
+
+def catalog_written_at():
+    """Unix time of the last catalog write (0 if unknown); see CatalogCacheMixin.may_store."""
+    return catalog_cache().get(WRITTEN_AT_KEY, 0)
+
+
+def _count(key):
+    cache = catalog_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def catalog_cache_stats():
+    cache = catalog_cache()
+    values = cache.get_many([HITS_KEY, MISSES_KEY, VERSION_KEY])
+    return {
+        'hits': values.get(HITS_KEY, 0),
+        'misses': values.get(MISSES_KEY, 0),
+        'version': values.get(VERSION_KEY, 1),
+    }
+
+
+class CatalogCacheMixin:
+    """
+    Read-through cache for list/retrieve responses of catalog viewsets.
+
+    The key is the view, action, lookup and the normalized (sorted) query string, so
+    ?ordering=x&page=2 and ?page=2&ordering=x share an entry. Writes to Product,
+    Collection or Promotion bump a catalog-wide version (store.signals) instead of
+    relying on TTL; CATALOG_CACHE_TIMEOUT is only an upper bound.
+
+    The conditional-GET validators (ConditionalGetMixin) are cached next to the body
+    under the same versioned key, so a hit, 304 or 200, runs no query at all.
+
+    `volatile_fields` change too often to version the whole catalog on (inventory moves
+    with every checkout), so by default they may lag by up to CATALOG_CACHE_TIMEOUT.
+    With CATALOG_CACHE_REFRESH_VOLATILE_FIELDS they are re-read by primary key for the
+    rows in the cached body on every hit instead, and the validators are recomputed,
+    since the version no longer covers everything in the response.
+    """
+    volatile_fields = ()
+
+    def refreshes_volatile_fields(self):
+        return bool(self.volatile_fields) and getattr(settings, 'CATALOG_CACHE_REFRESH_VOLATILE_FIELDS', False)
+
+    def get_cache_key(self, request):
+        query = urlencode(sorted((key, value) for key, values in request.query_params.lists() for value in values))
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')
+        raw = f'{request.get_host()}|{self.basename}|{self.action}|{lookup}|{query}'
+        return f'store:catalog:v{catalog_version()}:{md5(raw.encode()).hexdigest()}'
+
+    def cached_response(self, request, render):
+        timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', None)
+        if not timeout:
+            return render()
+
+        cache = catalog_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None and (not self.refreshes_volatile_fields() or self.refresh_volatile_fields(data)):
+            _count(HITS_KEY)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _count(MISSES_KEY)
+        response = render()
+        if response.status_code == 200 and self.may_store():
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def cached_validators(self, request, compute):
+        """ConditionalGetMixin's (last_modified, version) for this request, from the cache when possible."""
+        timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', None)
+        if not timeout or self.refreshes_volatile_fields():
+            return compute()
+
+        cache = catalog_cache()
+        key = f'{self.get_cache_key(request)}:validators'
+        validators = cache.get(key)
+        if validators is None:
+            validators = compute()
+            if self.may_store():
+                cache.set(key, validators, timeout)
+        return validators
+
+    def may_store(self):
+        # right after a version bump a replica may not have the write yet; storing its
+        # rows would keep serving them under the new version until the timeout
+        if pinned_database() is None:
+            return True
+        return time.time() - catalog_written_at() >= replica_setting('READ_AFTER_WRITE_SECONDS')
+
+    def refresh_volatile_fields(self, data):
+        """Overwrite volatile fields in a cached body in place; False if rows cannot be matched by id."""
+        if isinstance(data, dict) and 'results' in data:
+            items = data['results']
+        else:
+            items = data if isinstance(data, list) else [data]
+        fields = [field for field in self.volatile_fields if any(field in item for item in items)]
+        if not fields:
+            return True
+
+        if self.action == 'retrieve':
+            ids = {self.kwargs[self.lookup_url_kwarg or self.lookup_field]: items[0]}
+        elif all('id' in item for item in items):
+            ids = {str(item['id']): item for item in items}
+        else:
+            return False   #?fields= without id: serve fresh
+
+        rows = self.get_queryset().filter(pk__in=list(ids)).values_list('pk', *fields)
+        for pk, *values in rows:
+            item = ids.get(str(pk))
+            if item is not None:
+                item.update((field, value) for field, value in zip(fields, values) if field in item)
+        return True
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,173 @@
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Cart, CartItem
+
+PRICE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+MAX_QUANTITY = 32767   #CartItem.quantity is a PositiveSmallIntegerField
+
+
+def cart_items_queryset():
+    """Items with their product joined in and the line total computed by the database."""
+    return CartItem.objects.select_related('product') \
+        .annotate(total_price=ExpressionWrapper(F('quantity') * F('product__effective_price'), output_field=PRICE_FIELD))
+
+
+def carts_with_totals():
+    """Carts with total_price aggregated in SQL: one query for the carts, one for the items."""
+    return Cart.objects \
+        .annotate(total_price=Coalesce(
+            Sum(F('items__quantity') * F('items__product__effective_price'), output_field=PRICE_FIELD),
+            Value(Decimal(0)),
+            output_field=PRICE_FIELD,
+        )) \
+        .prefetch_related(Prefetch('items', queryset=cart_items_queryset()))
+
+
+def cart_cache_timeout():
+    return getattr(settings, 'CART_CACHE_TIMEOUT', None)
+
+
+def cart_version_key(cart_id):
+    try:
+        return f'store:cart:{UUID(str(cart_id))}:version'
+    except ValueError:
+        return None
+
+
+def cart_cache_key(cart_id):
+    """
+    Key of the cached cart under its current version, or None for a malformed id.
+    Read the key before reading the cart: a fill that raced a write then lands under
+    the version the write replaced, where nobody looks it up again.
+    """
+    version_key = cart_version_key(cart_id)
+    if version_key is None:
+        return None
+    # random versions, so a version key that expired or was evicted is never reused
+    version = cache.get_or_set(version_key, lambda: uuid4().hex, cart_cache_timeout())
+    return f'{version_key}:{version}'
+
+
+def invalidate_carts(*cart_ids):
+    """Move the carts to new versions now and again once the surrounding transaction commits."""
+    keys = [key for key in map(cart_version_key, cart_ids) if key]
+    if not keys or not cart_cache_timeout():
+        return
+
+    def bump():
+        cache.set_many({key: uuid4().hex for key in keys}, cart_cache_timeout())
+
+    bump()
+    if connection.in_atomic_block:   #a reader between now and the commit still sees the old rows
+        transaction.on_commit(bump)
+
+
+class QuantityLimitExceeded(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f'Quantity would exceed {MAX_QUANTITY} for products {product_ids}.')
+        self.product_ids = product_ids
+
+
+def upsert_cart_items(cart_id, quantities):
+    """
+    Add `quantities` ({product_id: quantity}) to a cart in one statement:
+    INSERT ... ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = quantity + excluded.quantity.
+    Concurrent adds to the same item are serialized by the row lock, so no increment is lost.
+    Returns the affected CartItem rows (id, product_id, quantity) keyed by product_id.
+
+    Raises QuantityLimitExceeded, writing nothing, if an item would pass MAX_QUANTITY;
+    the update carries the bound, so a concurrent add cannot slip past it.
+    """
+    if not quantities:
+        return {}
+    over = sorted(product_id for product_id, quantity in quantities.items() if quantity > MAX_QUANTITY)
+    if over:
+        raise QuantityLimitExceeded(over)
+    if connection.vendor not in ('postgresql', 'sqlite') or not connection.features.can_return_rows_from_bulk_insert:
+        return _increment_cart_items(cart_id, quantities)
+
+    meta = CartItem._meta
+    table = connection.ops.quote_name(meta.db_table)
+    cart_value = meta.get_field('cart').target_field.get_db_prep_value(cart_id, connection)
+    # sorted so concurrent multi-row upserts lock rows in the same order
+    rows = sorted(quantities.items())
+    values = ', '.join(['(%s, %s, %s)'] * len(rows))
+    params = [param for product_id, quantity in rows for param in (cart_value, product_id, quantity)]
+
+    sql = (
+        f'INSERT INTO {table} (cart_id, product_id, quantity) VALUES {values} '
+        f'ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {table}.quantity + excluded.quantity '
+        f'WHERE {table}.quantity <= {MAX_QUANTITY} - excluded.quantity '   #the sum itself would overflow smallint
+        f'RETURNING id, product_id, quantity'
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            result = cursor.fetchall()
+        # rows the bound kept from updating are not returned
+        over = sorted(set(quantities) - {product_id for _, product_id, _ in result})
+        if over:
+            raise QuantityLimitExceeded(over)
+    invalidate_carts(cart_id)
+
+    return {
+        product_id: CartItem(id=pk, cart_id=cart_id, product_id=product_id, quantity=quantity)
+        for pk, product_id, quantity in result
+    }
+
+
+def _increment_cart_items(cart_id, quantities):
+    items, over = {}, []
+    with transaction.atomic():
+        for product_id, quantity in sorted(quantities.items()):
+            item = CartItem.objects.filter(cart_id=cart_id, product_id=product_id)
+            updated = item.filter(quantity__lte=MAX_QUANTITY - quantity).update(quantity=F('quantity') + quantity)
+            if not updated and not item.exists():
+                try:
+                    with transaction.atomic():
+                        CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                        updated = 1
+                except IntegrityError:   #lost the race to a concurrent insert
+                    updated = item.filter(quantity__lte=MAX_QUANTITY - quantity).update(quantity=F('quantity') + quantity)
+            if not updated:
+                over.append(product_id)
+        if over:
+            raise QuantityLimitExceeded(over)
+        for item in CartItem.objects.filter(cart_id=cart_id, product_id__in=quantities):
+            items[item.product_id] = item
+    invalidate_carts(cart_id)
+    return items
+
+
+def purge_expired_carts(cutoff, batch_size):
+    """
+    Delete up to `batch_size` carts idle since before `cutoff`, oldest first, with their
+    items, in one short transaction. Candidates come from the last_activity index and are
+    locked with SKIP LOCKED so carts being written right now are left alone. Plain DELETEs
+    are used (no per-row signal dispatch); the item FK is deferred, so carts go first.
+    Returns (carts deleted, items deleted).
+    """
+    with transaction.atomic():
+        ids = list(
+            Cart.objects.filter(last_activity__lt=cutoff).order_by('last_activity')
+            .select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+        pk = Cart._meta.pk
+        values = [pk.get_db_prep_value(cart_id, connection) for cart_id in ids]
+        placeholders = ', '.join(['%s'] * len(values))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Cart._meta.db_table} WHERE id IN ({placeholders})', values)
+            carts = cursor.rowcount
+            cursor.execute(f'DELETE FROM {CartItem._meta.db_table} WHERE cart_id IN ({placeholders})', values)
+            items = cursor.rowcount
+    invalidate_carts(*ids)
+    return carts, items
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Cart, CartItem, Order, OrderItem, Product
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCart(CheckoutError):
+    pass
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, product_id):
+        super().__init__(f'Not enough inventory for product {product_id}.')
+        self.product_id = product_id
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, 'ORDER_RESERVATION_MINUTES', 30))
+
+
+def place_order(cart_id, customer):
+    """
+    Turn a cart into an Order with OrderItems and reserve inventory, all in one transaction.
+
+    The cart row is locked first, so a second checkout of the same cart (a double
+    submit) waits and then finds it gone. Each product is decremented with UPDATE ...
+    SET inventory = inventory - q WHERE inventory >= q, in ascending product id so
+    concurrent checkouts take row locks in the same order and cannot deadlock. A failed
+    decrement rolls everything back, so inventory never goes negative. The order stays
+    pending (holding the stock) until paid or until release_expired_reservations returns it.
+
+    The catalog cache is not invalidated: cached inventory lags until the entry times
+    out, unless CATALOG_CACHE_REFRESH_VOLATILE_FIELDS re-reads it on every hit.
+    """
+    with transaction.atomic():
+        if not Cart.objects.select_for_update().filter(pk=cart_id).values_list('pk', flat=True):
+            raise EmptyCart('The cart is empty.')
+        quantities = dict(
+            CartItem.objects.filter(cart_id=cart_id).order_by('product_id').values_list('product_id', 'quantity')
+        )
+        if not quantities:
+            raise EmptyCart('The cart is empty.')
+
+        now = timezone.now()
+        for product_id, quantity in quantities.items():
+            reserved = Product.objects.filter(pk=product_id, inventory__gte=quantity) \
+                .update(inventory=F('inventory') - quantity, last_update=now)
+            if not reserved:
+                raise OutOfStock(product_id)
+
+        prices = dict(Product.objects.filter(pk__in=quantities).values_list('id', 'effective_price'))
+        order = Order.objects.create(customer=customer)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, quantity=quantity, unit_price=prices[product_id])
+            for product_id, quantity in quantities.items()
+        ])
+        Cart.objects.filter(pk=cart_id).delete()
+    return order
+
+
+def release_order(order_id):
+    """Fail a still-pending order and put its quantities back; returns False if it was no longer pending."""
+    with transaction.atomic():
+        released = Order.objects.filter(pk=order_id, payment_status=Order.PAYMENT_STATUS_PENDING) \
+            .update(payment_status=Order.PAYMENT_STATUS_FAILED)
+        if not released:
+            return False
+        items = OrderItem.objects.filter(order_id=order_id).order_by('product_id').values_list('product_id', 'quantity')
+        now = timezone.now()
+        for product_id, quantity in items:
+            Product.objects.filter(pk=product_id).update(inventory=F('inventory') + quantity, last_update=now)
+    return True
+
+
+def expired_reservations(now=None):
+    cutoff = (now or timezone.now()) - reservation_ttl()
+    return Order.objects.filter(payment_status=Order.PAYMENT_STATUS_PENDING, placed_at__lt=cutoff) \
+        .order_by('placed_at')
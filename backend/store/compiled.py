@@ -0,0 +1,86 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .pagination import KeysetPagination
+
+# fields whose to_representation is the identity for values the database hands back
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+_compiled = {}
+
+
+class CompiledReader:
+    def __init__(self, columns, function):
+        self.columns = columns
+        self.function = function
+
+    def __call__(self, row):
+        return self.function(row)
+
+
+def compile_serializer(serializer):
+    """
+    Build (once per serializer class and field set) a function turning a
+    values_list() tuple into exactly what serializer.to_representation() returns
+    for the model instance. Returns None when a field cannot be read from a plain
+    column (method fields, nested serializers, source='*', ...).
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    if key not in _compiled:
+        _compiled[key] = _compile(serializer)
+    return _compiled[key]
+
+
+def _compile(serializer):
+    opts = serializer.Meta.model._meta
+    columns, converters, entries = [], {}, []
+    for index, (name, field) in enumerate(serializer.fields.items()):
+        if field.write_only:
+            continue
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+
+        columns.append(model_field.attname)
+        value = f'row[{len(columns) - 1}]'
+        if not isinstance(field, PASSTHROUGH_FIELDS):
+            converters[f'c{index}'] = field.to_representation
+            value = f'(None if {value} is None else c{index}({value}))'
+        entries.append(f'{name!r}: {value}')
+
+    source = 'def row_to_dict(row):\n    return {' + ', '.join(entries) + '}\n'
+    namespace = dict(converters)
+    exec(compile(source, f'<compiled {type(serializer).__name__}>', 'exec'), namespace)
+    return CompiledReader(columns, namespace['row_to_dict'])
+
+
+class CompiledReadMixin:
+    """
+    Viewset mixin: when `compiled_read` is on, list() reads values_list() tuples and
+    builds the response with the compiled row function instead of instantiating
+    models and running the serializer field by field. Output is identical; anything
+    the compiler cannot handle (or keyset pagination, which needs instances) falls
+    back to the regular path.
+    """
+    compiled_read = False
+
+    def list(self, request, *args, **kwargs):
+        reader = compile_serializer(self.get_serializer()) if self.compiled_read else None
+        if reader is None or isinstance(self.paginator, KeysetPagination):
+            return super().list(request, *args, **kwargs)
+
+        rows = self.filter_queryset(self.get_queryset()).values_list(*reader.columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([reader(row) for row in page])
+        return Response([reader(row) for row in rows])
@@ -0,0 +1,69 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .caching import catalog_version
+
+
+class ConditionalGetMixin:
+    """
+    ETag for list, ETag and Last-Modified for retrieve, derived from the model's `last_update`.
+
+    Lists use MAX(last_update) over the filtered queryset (an index-backed aggregate,
+    no COUNT(*)) plus the catalog version, which every catalog create and delete bumps
+    (store.signals); detail uses the row's own last_update. A matching If-None-Match
+    or If-Modified-Since is answered with 304 before the serializer runs.
+
+    Views that also use CatalogCacheMixin take the validators from the catalog cache
+    (CatalogCacheMixin.cached_validators), so a cached response costs no query; they
+    then move with the catalog version, like the cached body they describe.
+    """
+    last_modified_field = 'last_update'
+
+    def get_list_validators(self, queryset):
+        last_modified = queryset.order_by().aggregate(last_modified=Max(self.last_modified_field))['last_modified']
+        return last_modified, catalog_version()
+
+    def get_detail_validators(self, queryset):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        last_modified = queryset.filter(**{self.lookup_field: self.kwargs[lookup]}) \
+            .values_list(self.last_modified_field, flat=True).first()
+        return last_modified, 0
+
+    def conditional_response(self, request, validators, render):
+        last_modified, version = validators
+        if last_modified is None:
+            return render()
+
+        query = urlencode(sorted(request.query_params.items()))
+        raw = f'{self.basename}|{self.action}|{request.path}|{query}|{version}|{last_modified.isoformat()}'
+        etag = f'"{md5(raw.encode()).hexdigest()}"'
+        # a deleted row leaves a list's MAX(last_update) unchanged, so lists only get the ETag
+        timestamp = int(last_modified.timestamp()) if self.action == 'retrieve' else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def get_validators(self, request, compute):
+        cached_validators = getattr(self, 'cached_validators', None)
+        return cached_validators(request, compute) if cached_validators else compute()
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_validators(
+            request, lambda: self.get_list_validators(self.filter_queryset(self.get_queryset())))
+        return self.conditional_response(
+            request, validators, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_validators(request, lambda: self.get_detail_validators(self.get_queryset()))
+        return self.conditional_response(
+            request, validators, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,60 @@
+from django.core.exceptions import FieldDoesNotExist
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def requested_fields(request, available):
+    """
+    Names from `available` selected by ?fields=a,b and/or ?omit=c, in declared order.
+    Only GET requests are trimmed, so writes always validate the full serializer.
+    """
+    if request is None or request.method != 'GET':
+        return list(available)
+    fields = [name for name in request.query_params.get(FIELDS_PARAM, '').split(',') if name]
+    omit = {name for name in request.query_params.get(OMIT_PARAM, '').split(',') if name}
+    return [name for name in available if (not fields or name in fields) and name not in omit]
+
+
+class SparseFieldsMixin:
+    """Serializer mixin: drop the fields the client did not ask for (see requested_fields)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(requested_fields(self.context.get('request'), self.fields))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """
+    Viewset mixin: on list/retrieve, load only the columns the trimmed serializer reads
+    via .only(). Falls back to the full row whenever a field is not a plain column.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        params = self.request.query_params
+        if FIELDS_PARAM not in params and OMIT_PARAM not in params:
+            return queryset
+
+        serializer_fields = self.get_serializer_class()().fields
+        opts = queryset.model._meta
+        columns = {opts.pk.name} | self.get_ordering_columns(queryset)
+        for name in requested_fields(self.request, serializer_fields):
+            try:
+                field = opts.get_field(serializer_fields[name].source)
+            except FieldDoesNotExist:
+                return queryset
+            if not field.concrete or field.many_to_many:
+                return queryset
+            columns.add(field.name)
+        return queryset.only(*columns)
+
+    def get_ordering_columns(self, queryset):
+        # keyset pagination reads the ordering values off each row
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        return {field.lstrip('-') for field in queryset.query.order_by if isinstance(field, str)} & concrete
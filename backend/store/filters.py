@@ -6,5 +6,8 @@ class ProductFilter(FilterSet):
         model = Product
         fields = {
             'collection_id': ['exact'],
-            'unit_price': ['gt', 'lt']
+            'unit_price': ['gt', 'lt'],
+            'effective_price': ['gt', 'lt'],
+            'reviews_count': ['gte'],
+            'last_review_date': ['gte']
         }
\ No newline at end of file
@@ -0,0 +1,219 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .caching import bump_catalog_version
+from .carts import invalidate_carts
+from .models import CartItem, Collection, Product, Promotion
+
+IMPORT_FORMATS = ['csv', 'ndjson']
+# columns written by the upsert, and the ones an existing slug gets overwritten with
+INSERT_COLUMNS = ['title', 'slug', 'description', 'unit_price', 'effective_price', 'inventory', 'collection_id',
+                  'last_update', 'reviews_count']
+UPSERT_COLUMNS = ['title', 'description', 'unit_price', 'inventory', 'collection_id', 'last_update']
+MAX_UNIT_PRICE = Decimal('9999.99')
+MAX_INVENTORY = 2 ** 31 - 1
+TITLE_LENGTH = Product._meta.get_field('title').max_length
+SLUG_LENGTH = Product._meta.get_field('slug').max_length
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportStats:
+    """imported + superseded + rejected always adds up to the number of rows read."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.imported = 0
+        self.superseded = 0   #rows overridden by a later row for the same slug in the same batch
+        self.rejected = 0
+        self.errors = []
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return (self.imported + self.superseded + self.rejected) / elapsed if elapsed else 0
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'superseded': self.superseded,
+            'rejected': self.rejected,
+            'rows_per_second': round(self.rows_per_second),
+            'errors': self.errors,
+        }
+
+
+def read_rows(stream, import_format):
+    """Yield (line_number, dict) from a text stream without loading it into memory."""
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+
+
+def parse_promotions(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, list):
+        return [int(promotion) for promotion in value]
+    return [int(promotion) for promotion in str(value).split(';') if promotion.strip()]
+
+
+def parse_slug(value, title):
+    """An explicit slug must be valid as given; one derived from the title is cut to fit."""
+    if value:
+        slug = str(value).strip()
+        try:
+            validate_slug(slug)
+        except ValidationError:
+            raise ValueError('slug may only contain letters, numbers, underscores or hyphens.')
+        if len(slug) > SLUG_LENGTH:
+            raise ValueError(f'slug must be at most {SLUG_LENGTH} characters.')
+        return slug
+    slug = slugify(title)[:SLUG_LENGTH].strip('-_')
+    if not slug:
+        raise ValueError('slug is required when the title has no letters or numbers.')
+    return slug
+
+
+def parse_row(row, collection_ids, promotion_ids):
+    """Return ({column: value}, [promotion ids]) or raise ValueError with a message for the caller."""
+    if not isinstance(row, dict):
+        raise ValueError('Malformed row.')
+    title = (row.get('title') or '').strip()
+    if not title:
+        raise ValueError('title is required.')
+    if len(title) > TITLE_LENGTH:
+        raise ValueError(f'title must be at most {TITLE_LENGTH} characters.')
+    try:
+        unit_price = Decimal(str(row.get('unit_price'))).quantize(Decimal('0.01'))
+        inventory = int(row.get('inventory'))
+        collection_id = int(row.get('collection_id'))
+        promotions = parse_promotions(row.get('promotions'))
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError('unit_price, inventory, collection_id and promotions must be numeric.')
+    if not unit_price.is_finite() or not Decimal(0) <= unit_price <= MAX_UNIT_PRICE:
+        raise ValueError(f'unit_price must be between 0 and {MAX_UNIT_PRICE}.')
+    if not 0 <= inventory <= MAX_INVENTORY:
+        raise ValueError(f'inventory must be between 0 and {MAX_INVENTORY}.')
+    if collection_id not in collection_ids:
+        raise ValueError(f'Unknown collection_id {collection_id}.')
+    unknown = set(promotions) - promotion_ids
+    if unknown:
+        raise ValueError(f'Unknown promotions {sorted(unknown)}.')
+    slug = parse_slug(row.get('slug'), title)
+
+    product = {
+        'title': title,
+        'slug': slug,
+        'description': row.get('description') or None,
+        'unit_price': unit_price,
+        'inventory': inventory,
+        'collection_id': collection_id,
+    }
+    return product, promotions
+
+
+def upsert_products(products):
+    """
+    INSERT ... VALUES (...), (...) ON CONFLICT (slug) DO UPDATE for `products` (parse_row
+    dicts), in as few statements as the backend's parameter limit allows. Values go to
+    the driver as they are, skipping the model instances and per-value get_db_prep_save()
+    calls of bulk_create, which cost more than the database work.
+    """
+    ops = connection.ops
+    table = ops.quote_name(Product._meta.db_table)
+    columns = ', '.join(map(ops.quote_name, INSERT_COLUMNS))
+    updates = ', '.join(f'{column} = excluded.{column}' for column in map(ops.quote_name, UPSERT_COLUMNS))
+    row_sql = f"({', '.join(['%s'] * len(INSERT_COLUMNS))})"
+    rows_per_statement = (connection.features.max_query_params or 2 ** 16 - 1) // len(INSERT_COLUMNS)
+
+    now = ops.adapt_datetimefield_value(timezone.now())
+    rows = []
+    for product in products:
+        unit_price = ops.adapt_decimalfield_value(product['unit_price'])
+        # effective_price starts at unit_price, as EffectivePriceField does; the store_product and
+        # promotions triggers (migration 0011) apply discounts on insert, update and linking
+        rows.append((product['title'], product['slug'], product['description'], unit_price, unit_price,
+                     product['inventory'], product['collection_id'], now, 0))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), rows_per_statement):
+            chunk = rows[start:start + rows_per_statement]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join([row_sql] * len(chunk))} "
+                f'ON CONFLICT (slug) DO UPDATE SET {updates}',
+                [value for row in chunk for value in row],
+            )
+
+
+def import_products(stream, import_format, batch_size=5000, progress=None):
+    """
+    Upsert products keyed on slug from a CSV or NDJSON text stream, `batch_size` rows
+    per transaction: one INSERT ... ON CONFLICT (slug) DO UPDATE per batch (upsert_products)
+    plus one bulk insert into the promotions through-table. Collections and promotions are
+    validated against id sets loaded once up front. `progress(stats)` runs after each batch.
+    """
+    stats = ImportStats()
+    collection_ids = set(Collection.objects.values_list('id', flat=True))
+    promotion_ids = set(Promotion.objects.values_list('id', flat=True))
+    Through = Product.promotions.through
+
+    rows = read_rows(stream, import_format)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        products = {}   #by slug; a later row for the same slug wins
+        for line, row in batch:
+            try:
+                product, promotions = parse_row(row, collection_ids, promotion_ids)
+            except ValueError as error:
+                stats.reject(line, str(error))
+                continue
+            if product['slug'] in products:
+                stats.superseded += 1
+            products[product['slug']] = (product, promotions)
+
+        if products:
+            with transaction.atomic():
+                upsert_products([product for product, _ in products.values()])
+                ids = dict(Product.objects.filter(slug__in=products).values_list('slug', 'id'))
+                Through.objects.bulk_create(
+                    [
+                        Through(product_id=ids[slug], promotion_id=promotion_id)
+                        for slug, (_, promotions) in products.items()
+                        for promotion_id in promotions
+                    ],
+                    ignore_conflicts=True,
+                )
+                cart_ids = CartItem.objects.filter(product_id__in=ids.values()) \
+                    .values_list('cart_id', flat=True).distinct()
+            invalidate_carts(*cart_ids)
+            stats.imported += len(products)
+
+        if progress:
+            progress(stats)
+
+    bump_catalog_version()
+    return stats
@@ -0,0 +1,98 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+from store.models import Cart, Collection, Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/sec and tail latency of the DRF viewsets under WSGI (one thread and connection per '
+        'concurrent client) and under ASGI, and the async-native /store/async/ endpoints under ASGI. '
+        'Uses the data already in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        product = Product.objects.values_list('id', flat=True).first()
+        collection = Collection.objects.values_list('id', flat=True).first()
+        cart = Cart.objects.values_list('id', flat=True).first()
+        if product is None or collection is None:
+            raise CommandError('Load some products first (e.g. manage.py import_products).')
+
+        pairs = [
+            ('products-list', '/store/products/', '/store/async/products/'),
+            ('products-detail', f'/store/products/{product}/', f'/store/async/products/{product}/'),
+            ('collections-list', '/store/collections/', '/store/async/collections/'),
+            ('collections-detail', f'/store/collections/{collection}/', f'/store/async/collections/{collection}/'),
+        ]
+        if cart is not None:
+            pairs.append(('carts-detail', f'/store/carts/{cart}/', f'/store/async/carts/{cart}/'))
+
+        total, concurrency = options['requests'], options['concurrency']
+        # the test clients always send Host: testserver; the async views have no response caches, so neither may DRF
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                               CATALOG_CACHE_TIMEOUT=None, CART_CACHE_TIMEOUT=None):
+            for name, sync_path, async_path in pairs:
+                for label, result in (
+                    ('drf-wsgi', self.load_wsgi(sync_path, total, concurrency)),
+                    ('drf-asgi', asyncio.run(self.load(sync_path, total, concurrency))),
+                    ('async', asyncio.run(self.load(async_path, total, concurrency))),
+                ):
+                    self.stdout.write(
+                        f"{name:<20} {label:<8} {result['rps']:>8.1f} req/s "
+                        f"p50 {result['p50']:>7.2f}ms p99 {result['p99']:>7.2f}ms errors {result['errors']}"
+                    )
+
+    def summarize(self, total, elapsed, timings, errors):
+        cuts = statistics.quantiles(timings, n=100)
+        return {'rps': total / elapsed, 'p50': statistics.median(timings), 'p99': cuts[98], 'errors': errors}
+
+    def load_wsgi(self, path, total, concurrency):
+        timings, errors = [], []
+
+        def worker(count):
+            client = Client()
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    errors.append(response.status_code != 200)
+            finally:
+                connection.close()
+
+        counts = [total // concurrency + (index < total % concurrency) for index in range(concurrency)]
+        threads = [threading.Thread(target=worker, args=(count,)) for count in counts if count]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.summarize(total, time.perf_counter() - started, timings, sum(errors))
+
+    async def load(self, path, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        timings, errors = [], 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return self.summarize(total, time.perf_counter() - started, timings, errors)
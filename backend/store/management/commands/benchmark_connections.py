@@ -0,0 +1,44 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure what share of a trivial request is spent obtaining a database connection, '
+        'under the current STORE_DB_POOL mode. Run once per mode to compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        acquire, query = [], []
+        for _ in range(options['iterations']):
+            # what the request cycle does: close_old_connections() at the end, connect lazily at the start
+            connection.close_if_unusable_or_obsolete()
+
+            started = time.perf_counter()
+            connection.ensure_connection()
+            connected = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            done = time.perf_counter()
+
+            acquire.append((connected - started) * 1000)
+            query.append((done - connected) * 1000)
+
+        pool = getattr(connection, 'pool', None)
+        mode = 'pool' if pool is not None else ('persistent' if connection.settings_dict.get('CONN_MAX_AGE') else 'off')
+        acquire_ms, query_ms = statistics.median(acquire), statistics.median(query)
+        self.stdout.write(
+            f'{connection.vendor} mode={mode}: connect p50 {acquire_ms:.3f}ms, SELECT 1 p50 {query_ms:.3f}ms, '
+            f'connection share {acquire_ms / (acquire_ms + query_ms):.0%}'
+        )
+        if pool is not None:
+            self.stdout.write(str(pool.get_stats()))
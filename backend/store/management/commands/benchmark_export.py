@@ -0,0 +1,107 @@
+import resource
+import sys
+import time
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from store.export import EXPORT_FORMATS, export_response
+from store.models import Collection, Product
+
+BATCH_SIZE = 5000
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def rss_mb():
+    """Current RSS where /proc exists; elsewhere the peak, which seeding may already have raised."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+
+def seed(products, collections):
+    """Insert products batch by batch so seeding itself does not raise the RSS peak."""
+    connection.queries_log.clear()
+    Collection.objects.bulk_create(Collection(title=f'Export {i}') for i in range(collections))
+    collection_ids = list(Collection.objects.values_list('id', flat=True)[:collections])
+    for start in range(0, products, BATCH_SIZE):
+        Product.objects.bulk_create(
+            Product(
+                title=f'Export product {i}',
+                slug=f'export-product-{i}',
+                description='Lorem ipsum dolor sit amet ' * 4,
+                unit_price=Decimal(i % 99_999) / 100,
+                inventory=i % 500,
+                collection_id=collection_ids[i % len(collection_ids)],
+            )
+            for i in range(start, min(start + BATCH_SIZE, products))
+        )
+        connection.queries_log.clear()   # with DEBUG on, every batch's INSERT would stay in memory
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed --products rows, stream the products export through export_response and sample the '
+        'process RSS (current and peak) every --sample-every rows. Fails if RSS grows by more than --max-growth-mb. '
+        'Everything runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1_000_000)
+        parser.add_argument('--collections', type=int, default=10_000)
+        parser.add_argument('--export-format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--sample-every', type=int, default=100_000)
+        parser.add_argument('--max-growth-mb', type=float, default=50)
+        parser.add_argument('--asynchronous', action='store_true',
+                            help='Consume the async body served under ASGI instead of the WSGI one.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['products']} products on {connection.vendor}...")
+            seed(options['products'], options['collections'])
+            growth = self.export(options)
+            transaction.set_rollback(True)
+
+        if growth > options['max_growth_mb']:
+            raise CommandError(f"RSS grew by {growth:.1f} MB while streaming (limit {options['max_growth_mb']} MB).")
+        self.stdout.write(self.style.SUCCESS(f'RSS grew by {growth:.1f} MB while streaming.'))
+
+    def export(self, options):
+        response = export_response(Product.objects.all(), options['export_format'], options['asynchronous'])
+        before = rss_mb()
+        started = time.perf_counter()
+        lines = size = 0
+
+        def record(chunk):
+            nonlocal lines, size
+            lines += 1
+            size += len(chunk)
+            if lines % options['sample_every'] == 0:
+                self.stdout.write(f'{lines:>10} lines  {size / 2**20:>9.1f} MB out  RSS {rss_mb():>7.1f} MB  peak {peak_rss_mb():>7.1f} MB')
+
+        async def consume():
+            async for chunk in response.streaming_content:
+                record(chunk)
+
+        if options['asynchronous']:
+            # async_to_sync keeps the ORM calls of aiterator() on this thread, inside the seeding transaction
+            async_to_sync(consume)()
+        else:
+            for chunk in response.streaming_content:
+                record(chunk)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{lines} lines, {size / 2**20:.1f} MB in {elapsed:.1f}s ({lines / elapsed:.0f} lines/s); '
+            f'RSS {before:.1f} MB before streaming, {rss_mb():.1f} MB after (peak {peak_rss_mb():.1f} MB)'
+        )
+        return rss_mb() - before
@@ -0,0 +1,73 @@
+import timeit
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer, orjson
+
+
+def product_page(size):
+    """Same shape as a ProductViewSet list page (DefaultPagination + ProductSerializer)."""
+    return {
+        'count': 100_000,
+        'next': 'http://localhost/store/products/?page=3',
+        'previous': 'http://localhost/store/products/?page=1',
+        'results': [
+            {
+                'id': i,
+                'title': f'Product {i} – ünïcödé',
+                'slug': f'product-{i}',
+                'description': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 4,
+                'unit_price': Decimal(i % 9999) + Decimal('0.99'),
+                'inventory': i % 500,
+                'collection': i % 100,
+            }
+            for i in range(size)
+        ],
+    }
+
+
+def cart(size):
+    """Same shape as CartViewSet.retrieve (CartSerializer)."""
+    items = [
+        {
+            'id': i,
+            'product': {'id': i, 'title': f'Product {i}', 'unit_price': Decimal('19.99')},
+            'quantity': 2,
+            'total_price': Decimal('39.98'),
+        }
+        for i in range(size)
+    ]
+    return {'id': uuid.uuid4(), 'items': items, 'total_price': Decimal('39.98') * size}
+
+
+class Command(BaseCommand):
+    help = 'Compare FastJSONRenderer against DRF JSONRenderer on product-page and cart payloads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; FastJSONRenderer is falling back to DRF.')
+
+        payloads = {
+            'products page of 10': product_page(10),
+            'products page of 100': product_page(100),
+            'cart with 50 items': cart(50),
+        }
+        default, fast = JSONRenderer(), FastJSONRenderer()
+        for name, data in payloads.items():
+            expected, actual = default.render(data), fast.render(data)
+            if expected != actual:
+                raise CommandError(f'{name}: output differs from JSONRenderer')
+
+            number = options['number']
+            default_ms = timeit.timeit(lambda: default.render(data), number=number) * 1000 / number
+            fast_ms = timeit.timeit(lambda: fast.render(data), number=number) * 1000 / number
+            self.stdout.write(
+                f'{name:<22} {len(actual):>7} bytes  JSONRenderer {default_ms:.3f}ms  '
+                f'FastJSONRenderer {fast_ms:.3f}ms  ({default_ms / fast_ms:.1f}x)'
+            )
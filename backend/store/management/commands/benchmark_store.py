@@ -0,0 +1,63 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from store import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a realistic catalog, hit every store route and record query counts, p50/p95 latency '
+        'and response bytes as JSON. Fails if query counts scale with result size or exceed --baseline. '
+        'Everything runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--collections', type=int, default=10_000)
+        parser.add_argument('--cart-items', type=int, default=50)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', help='Write results to this JSON file.')
+        parser.add_argument('--baseline', help='Fail if any route needs more queries than in this earlier --output.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+
+        # response caches would hide the database work we are measuring
+        with override_settings(CATALOG_CACHE_TIMEOUT=None, CART_CACHE_TIMEOUT=None), transaction.atomic():
+            self.stdout.write(f"Seeding {options['products']} products on {connection.vendor}...")
+            ids = benchmark.seed(
+                products=options['products'],
+                collections=options['collections'],
+                cart_items=options['cart_items'],
+            )
+            results, groups = benchmark.run(ids, options['iterations'])
+            transaction.set_rollback(True)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<28} {result['status']:>3} {result['queries']:>3} queries "
+                f"p50 {result['p50_ms']:>8.2f}ms p95 {result['p95_ms']:>8.2f}ms {result['bytes']:>9} bytes"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'vendor': connection.vendor,
+                    'python': platform.python_version(),
+                    'options': {key: options[key] for key in ('products', 'collections', 'cart_items', 'iterations')},
+                    'results': results,
+                }, file, indent=2)
+
+        problems = benchmark.compare(results, groups, baseline)
+        if problems:
+            raise CommandError('Query regressions:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('No query regressions.'))
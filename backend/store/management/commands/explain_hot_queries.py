@@ -0,0 +1,77 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from store import benchmark
+from store.models import Customer, Order, Product, Review, User
+
+# plan nodes that read a whole table; SQLite's "SCAN t USING [COVERING] INDEX i" walks an index instead
+FULL_SCAN_PLAN = {
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)\b'),
+}
+
+
+def full_scans(plan, vendor):
+    """Tables the plan reads in full."""
+    return set(FULL_SCAN_PLAN[vendor].findall(plan))
+
+
+def hot_queries(ids):
+    """name: (queryset, models none of whose tables may be scanned in full)"""
+    collection, product = ids['collection'], ids['product']
+    return {
+        'products by collection and price': (Product.objects
+            .filter(collection_id=collection, unit_price__gt=10).order_by('unit_price')[:10], [Product]),
+        'products ordered by price': (Product.objects.order_by('unit_price', 'id')[:10], [Product]),
+        'products ordered by last update': (Product.objects.order_by('-last_update', '-id')[:10], [Product]),
+        'reviews of a product': (Review.objects.filter(product_id=product).order_by('date'), [Review]),
+        'customers by name': (Customer.objects.all()[:10], [Customer, User]),
+        'pending orders': (
+            Order.objects.filter(payment_status=Order.PAYMENT_STATUS_PENDING).order_by('placed_at')[:10], [Order]),
+    }
+
+
+def check_plans(ids, vendor):
+    """(name, plan, fully scanned tables) for each hot query."""
+    for name, (queryset, models) in hot_queries(ids).items():
+        plan = queryset.explain()
+        yield name, plan, full_scans(plan, vendor) & {model._meta.db_table for model in models}
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot store queries and fail if any plan reads one of their tables in full. '
+        'With --seed the data is generated first and rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Seed a large catalog in a rolled-back transaction.')
+        parser.add_argument('--products', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PLAN:
+            raise CommandError(f'No plan checks for {connection.vendor}.')
+
+        failures = []
+        with transaction.atomic():
+            if options['seed']:
+                ids = benchmark.seed(products=options['products'], collections=max(options['products'] // 10, 1))
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            else:
+                ids = {
+                    'collection': Product.objects.values_list('collection_id', flat=True).first() or 0,
+                    'product': Product.objects.values_list('id', flat=True).first() or 0,
+                }
+
+            for name, plan, scanned in check_plans(ids, connection.vendor):
+                self.stdout.write(f"{'SCAN' if scanned else 'ok  '} {name}\n    " + plan.replace('\n', '\n    '))
+                if scanned:
+                    failures.append(f"{name} ({', '.join(sorted(scanned))})")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Full table scans: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('No hot query scans a whole table.'))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.importer import IMPORT_FORMATS, import_products
+
+
+class Command(BaseCommand):
+    help = 'Upsert products (keyed on slug) from a CSV or NDJSON file in batched bulk statements.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS,
+                            help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['import_format'] or path.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot tell the format of {path}; pass --format {'|'.join(IMPORT_FORMATS)}.")
+
+        def progress(stats):
+            self.stdout.write(
+                f'{stats.imported} imported, {stats.superseded} superseded, {stats.rejected} rejected '
+                f'({stats.rows_per_second:.0f} rows/s)'
+            )
+
+        if path == '-':
+            stats = import_products(sys.stdin, import_format, options['batch_size'], progress)
+        else:
+            with open(path, newline='', encoding='utf-8') as stream:
+                stats = import_products(stream, import_format, options['batch_size'], progress)
+
+        for error in stats.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {stats.imported} imported, {stats.superseded} superseded, {stats.rejected} rejected '
+            f'({stats.rows_per_second:.0f} rows/s).'
+        ))
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from store.carts import purge_expired_carts
+
+
+class Command(BaseCommand):
+    help = 'Delete carts with no item activity for CART_EXPIRY_DAYS, in small index-driven batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches.')
+        parser.add_argument('--days', type=float, help='Override CART_EXPIRY_DAYS.')
+        parser.add_argument('--loop', type=float, metavar='SECONDS', help='Keep running, sleeping this long when caught up.')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'CART_EXPIRY_DAYS', 30)
+        while True:
+            cutoff = timezone.now() - timedelta(days=days)
+            started = time.monotonic()
+            total_carts = total_items = 0
+            while True:
+                carts, items = purge_expired_carts(cutoff, options['batch_size'])
+                total_carts += carts
+                total_items += items
+                if carts < options['batch_size']:
+                    break
+                time.sleep(options['pause'])
+
+            elapsed = time.monotonic() - started
+            rate = (total_carts + total_items) / elapsed if elapsed else 0
+            self.stdout.write(f'Purged {total_carts} carts and {total_items} items ({rate:.0f} rows/s).')
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from store.models import Collection, Product
+
+
+class Command(BaseCommand):
+    help = 'Check Collection.products_count against the product table and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report collections whose counter is wrong.')
+        parser.add_argument('--rebuild', action='store_true', help='Recompute every counter in a single UPDATE.')
+
+    def handle(self, *args, **options):
+        actual = Product.objects.filter(collection_id=OuterRef('pk')) \
+            .order_by().values('collection_id').annotate(count=Count('id')).values('count')
+        actual_count = Coalesce(Subquery(actual), Value(0))
+
+        if options['rebuild']:
+            updated = Collection.objects.update(products_count=actual_count)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt products_count for {updated} collections.'))
+            return
+
+        with transaction.atomic():
+            drifted = Collection.objects.annotate(actual=actual_count).exclude(products_count=F('actual'))
+            if not options['dry_run']:
+                drifted = drifted.select_for_update(of=('self',))
+            drifted = list(drifted.values('id', 'products_count', 'actual'))
+
+            for row in drifted:
+                self.stdout.write(f"collection {row['id']}: stored {row['products_count']}, actual {row['actual']}")
+                if not options['dry_run']:
+                    Collection.objects.filter(pk=row['id']).update(products_count=row['actual'])
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drifted)} drifted collections.'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.checkout import expired_reservations, release_order
+
+
+class Command(BaseCommand):
+    help = 'Fail pending orders older than ORDER_RESERVATION_MINUTES and return their inventory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', type=float, metavar='SECONDS', help='Keep running, sleeping this long between passes.')
+
+    def handle(self, *args, **options):
+        while True:
+            released = 0
+            while True:
+                ids = list(expired_reservations().values_list('id', flat=True)[:options['batch_size']])
+                released += sum(release_order(order_id) for order_id in ids)
+                if len(ids) < options['batch_size']:
+                    break
+            self.stdout.write(f'Released {released} expired reservations.')
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
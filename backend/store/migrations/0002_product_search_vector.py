@@ -0,0 +1,54 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON store_product
+    FOR EACH ROW EXECUTE FUNCTION store_product_search_vector_update();
+    """,
+    "UPDATE store_product SET title = title;",
+    "CREATE INDEX store_product_search_vector_gin ON store_product USING gin (search_vector);",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS store_product_search_vector_gin;",
+    "DROP TRIGGER IF EXISTS store_product_search_vector_trigger ON store_product;",
+    "DROP FUNCTION IF EXISTS store_product_search_vector_update();",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(SEARCH_SQL), run_on_postgresql(REVERSE_SQL)),
+    ]
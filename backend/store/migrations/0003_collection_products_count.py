@@ -0,0 +1,98 @@
+from django.db import migrations, models
+
+
+POSTGRESQL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_collection_products_count_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE store_collection SET products_count = products_count - 1 WHERE id = OLD.collection_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE store_collection SET products_count = products_count + 1 WHERE id = NEW.collection_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_collection_products_count_trigger
+    AFTER INSERT OR DELETE ON store_product
+    FOR EACH ROW EXECUTE FUNCTION store_collection_products_count_update();
+    """,
+    """
+    CREATE TRIGGER store_collection_products_count_move_trigger
+    AFTER UPDATE OF collection_id ON store_product
+    FOR EACH ROW WHEN (OLD.collection_id IS DISTINCT FROM NEW.collection_id)
+    EXECUTE FUNCTION store_collection_products_count_update();
+    """,
+]
+
+POSTGRESQL_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_collection_products_count_trigger ON store_product;",
+    "DROP TRIGGER IF EXISTS store_collection_products_count_move_trigger ON store_product;",
+    "DROP FUNCTION IF EXISTS store_collection_products_count_update();",
+]
+
+SQLITE_SQL = [
+    """
+    CREATE TRIGGER store_collection_products_count_insert AFTER INSERT ON store_product
+    BEGIN
+        UPDATE store_collection SET products_count = products_count + 1 WHERE id = NEW.collection_id;
+    END;
+    """,
+    """
+    CREATE TRIGGER store_collection_products_count_delete AFTER DELETE ON store_product
+    BEGIN
+        UPDATE store_collection SET products_count = products_count - 1 WHERE id = OLD.collection_id;
+    END;
+    """,
+    """
+    CREATE TRIGGER store_collection_products_count_move AFTER UPDATE OF collection_id ON store_product
+    WHEN OLD.collection_id IS NOT NEW.collection_id
+    BEGIN
+        UPDATE store_collection SET products_count = products_count - 1 WHERE id = OLD.collection_id;
+        UPDATE store_collection SET products_count = products_count + 1 WHERE id = NEW.collection_id;
+    END;
+    """,
+]
+
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_collection_products_count_insert;",
+    "DROP TRIGGER IF EXISTS store_collection_products_count_delete;",
+    "DROP TRIGGER IF EXISTS store_collection_products_count_move;",
+]
+
+BACKFILL_SQL = """
+    UPDATE store_collection SET products_count = (
+        SELECT COUNT(*) FROM store_product WHERE store_product.collection_id = store_collection.id
+    );
+"""
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_SQL, SQLITE_SQL),
+            run_for_vendor(POSTGRESQL_REVERSE_SQL, SQLITE_REVERSE_SQL),
+        ),
+    ]
@@ -0,0 +1,111 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# products_count changes are part of a collection's representation, so the counter
+# triggers from 0003 now also move last_update (used for ETag / Last-Modified)
+POSTGRESQL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_collection_products_count_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE store_collection SET products_count = products_count - 1, last_update = now()
+            WHERE id = OLD.collection_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE store_collection SET products_count = products_count + 1, last_update = now()
+            WHERE id = NEW.collection_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+]
+
+POSTGRESQL_REVERSE_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_collection_products_count_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE store_collection SET products_count = products_count - 1 WHERE id = OLD.collection_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE store_collection SET products_count = products_count + 1 WHERE id = NEW.collection_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS store_collection_products_count_insert;",
+    "DROP TRIGGER IF EXISTS store_collection_products_count_delete;",
+    "DROP TRIGGER IF EXISTS store_collection_products_count_move;",
+]
+
+
+def sqlite_triggers(touch):
+    now = ", last_update = strftime('%Y-%m-%d %H:%M:%f', 'now')" if touch else ''
+    return SQLITE_DROP_SQL + [
+        f"""
+        CREATE TRIGGER store_collection_products_count_insert AFTER INSERT ON store_product
+        BEGIN
+            UPDATE store_collection SET products_count = products_count + 1{now} WHERE id = NEW.collection_id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER store_collection_products_count_delete AFTER DELETE ON store_product
+        BEGIN
+            UPDATE store_collection SET products_count = products_count - 1{now} WHERE id = OLD.collection_id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER store_collection_products_count_move AFTER UPDATE OF collection_id ON store_product
+        WHEN OLD.collection_id IS NOT NEW.collection_id
+        BEGIN
+            UPDATE store_collection SET products_count = products_count - 1{now} WHERE id = OLD.collection_id;
+            UPDATE store_collection SET products_count = products_count + 1{now} WHERE id = NEW.collection_id;
+        END;
+        """,
+    ]
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_collection_products_count'),
+    ]
+
+    operations = [
+        # SQLite rebuilds store_collection for the AddField below, and the rename back
+        # fails while store_product triggers still reference it
+        migrations.RunPython(
+            run_for_vendor([], SQLITE_DROP_SQL),
+            run_for_vendor([], sqlite_triggers(touch=False)),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='last_update',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_update',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_SQL, sqlite_triggers(touch=True)),
+            run_for_vendor(POSTGRESQL_REVERSE_SQL, SQLITE_DROP_SQL),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+SLUG_LENGTH = 50
+
+
+def deduplicate_slugs(apps, schema_editor):
+    """Keep each slug on its lowest-id product and suffix the others with their id."""
+    Product = apps.get_model('store', 'Product')
+    products = Product.objects.using(schema_editor.connection.alias)
+    duplicated = products.values('slug').annotate(n=models.Count('id')).filter(n__gt=1).values_list('slug', flat=True)
+    taken = set(products.values_list('slug', flat=True))
+    for slug in list(duplicated):
+        for product in products.filter(slug=slug).order_by('id')[1:]:
+            suffix = f'-{product.pk}'
+            candidate = (slug or 'product')[:SLUG_LENGTH - len(suffix)] + suffix
+            while candidate in taken:
+                suffix += 'x'
+                candidate = (slug or 'product')[:SLUG_LENGTH - len(suffix)] + suffix
+            taken.add(candidate)
+            products.filter(pk=product.pk).update(slug=candidate)
+
+
+def restore_sqlite_triggers(apps, schema_editor):
+    # SQLite rebuilds store_product for the AlterField, which drops the triggers defined on it
+    if schema_editor.connection.vendor == 'sqlite':
+        previous = import_module('store.migrations.0004_collection_review_last_update')
+        for statement in previous.sqlite_triggers(touch=True):
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_collection_review_last_update'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_triggers),
+        migrations.AlterField(
+            model_name='product',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.RunPython(restore_sqlite_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Round
+
+
+def backfill_effective_price(apps, schema_editor):
+    # same expression as store.pricing.effective_price_expression, against the historical models
+    Product = apps.get_model('store', 'Product')
+    discount_field = models.DecimalField(max_digits=5, decimal_places=4)
+    price_field = models.DecimalField(max_digits=6, decimal_places=2)
+    best_discount = Product.promotions.through.objects \
+        .filter(product_id=OuterRef('pk')) \
+        .values('product_id') \
+        .annotate(discount=Max('promotion__discount')) \
+        .values('discount')
+    discount = Cast(Coalesce(Subquery(best_discount), Value(0.0)), discount_field)
+    Product.objects.update(effective_price=Greatest(
+        Round(F('unit_price') * (Value(Decimal(1), output_field=discount_field) - discount), 2, output_field=price_field),
+        Value(Decimal(0), output_field=price_field),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=6, null=True),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='store_prod_eff_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['collection', 'effective_price'], name='store_prod_coll_eff_price_idx'),
+        ),
+    ]
@@ -0,0 +1,131 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+POSTGRESQL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_product_reviews_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE store_product SET
+                reviews_count = reviews_count - 1,
+                last_review_date = (SELECT MAX(date) FROM store_review WHERE product_id = OLD.product_id),
+                last_update = now()
+            WHERE id = OLD.product_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE store_product SET
+                reviews_count = reviews_count + 1,
+                last_review_date = GREATEST(last_review_date, NEW.date),
+                last_update = now()
+            WHERE id = NEW.product_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_product_reviews_trigger
+    AFTER INSERT OR DELETE ON store_review
+    FOR EACH ROW EXECUTE FUNCTION store_product_reviews_update();
+    """,
+    """
+    CREATE TRIGGER store_product_reviews_move_trigger
+    AFTER UPDATE OF product_id ON store_review
+    FOR EACH ROW WHEN (OLD.product_id IS DISTINCT FROM NEW.product_id)
+    EXECUTE FUNCTION store_product_reviews_update();
+    """,
+]
+
+POSTGRESQL_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_product_reviews_trigger ON store_review;",
+    "DROP TRIGGER IF EXISTS store_product_reviews_move_trigger ON store_review;",
+    "DROP FUNCTION IF EXISTS store_product_reviews_update();",
+]
+
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+SQLITE_ADD = f"""
+    UPDATE store_product SET
+        reviews_count = reviews_count + 1,
+        last_review_date = MAX(COALESCE(last_review_date, NEW.date), NEW.date),
+        last_update = {SQLITE_NOW}
+    WHERE id = NEW.product_id;
+"""
+SQLITE_REMOVE = f"""
+    UPDATE store_product SET
+        reviews_count = reviews_count - 1,
+        last_review_date = (SELECT MAX(date) FROM store_review WHERE product_id = OLD.product_id),
+        last_update = {SQLITE_NOW}
+    WHERE id = OLD.product_id;
+"""
+
+SQLITE_SQL = [
+    f"CREATE TRIGGER store_product_reviews_insert AFTER INSERT ON store_review BEGIN {SQLITE_ADD} END;",
+    f"CREATE TRIGGER store_product_reviews_delete AFTER DELETE ON store_review BEGIN {SQLITE_REMOVE} END;",
+    f"""
+    CREATE TRIGGER store_product_reviews_move AFTER UPDATE OF product_id ON store_review
+    WHEN OLD.product_id IS NOT NEW.product_id
+    BEGIN {SQLITE_REMOVE} {SQLITE_ADD} END;
+    """,
+]
+
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_product_reviews_insert;",
+    "DROP TRIGGER IF EXISTS store_product_reviews_delete;",
+    "DROP TRIGGER IF EXISTS store_product_reviews_move;",
+]
+
+BACKFILL_SQL = """
+    UPDATE store_product SET
+        reviews_count = (SELECT COUNT(*) FROM store_review WHERE store_review.product_id = store_product.id),
+        last_review_date = (SELECT MAX(date) FROM store_review WHERE store_review.product_id = store_product.id);
+"""
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def restore_sqlite_triggers(apps, schema_editor):
+    # SQLite rebuilds store_product for the AddField with a default, which drops the
+    # products_count triggers defined on it
+    if schema_editor.connection.vendor == 'sqlite':
+        previous = import_module('store.migrations.0004_collection_review_last_update')
+        for statement in previous.sqlite_triggers(touch=True):
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_product_effective_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_triggers),
+        migrations.AddField(
+            model_name='product',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='last_review_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(restore_sqlite_triggers, migrations.RunPython.noop),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_SQL, SQLITE_SQL),
+            run_for_vendor(POSTGRESQL_REVERSE_SQL, SQLITE_REVERSE_SQL),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['reviews_count', 'id'], name='store_prod_reviews_idx'),
+        ),
+    ]
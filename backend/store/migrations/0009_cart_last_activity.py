@@ -0,0 +1,79 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+POSTGRESQL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_cart_touch() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE store_cart SET last_activity = now() WHERE id = OLD.cart_id;
+        ELSE
+            UPDATE store_cart SET last_activity = now() WHERE id = NEW.cart_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_cart_touch_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON store_cartitem
+    FOR EACH ROW EXECUTE FUNCTION store_cart_touch();
+    """,
+]
+
+POSTGRESQL_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_cart_touch_trigger ON store_cartitem;",
+    "DROP FUNCTION IF EXISTS store_cart_touch();",
+]
+
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+SQLITE_SQL = [
+    f"""
+    CREATE TRIGGER store_cart_touch_insert AFTER INSERT ON store_cartitem
+    BEGIN UPDATE store_cart SET last_activity = {SQLITE_NOW} WHERE id = NEW.cart_id; END;
+    """,
+    f"""
+    CREATE TRIGGER store_cart_touch_update AFTER UPDATE ON store_cartitem
+    BEGIN UPDATE store_cart SET last_activity = {SQLITE_NOW} WHERE id = NEW.cart_id; END;
+    """,
+    f"""
+    CREATE TRIGGER store_cart_touch_delete AFTER DELETE ON store_cartitem
+    BEGIN UPDATE store_cart SET last_activity = {SQLITE_NOW} WHERE id = OLD.cart_id; END;
+    """,
+]
+
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_cart_touch_insert;",
+    "DROP TRIGGER IF EXISTS store_cart_touch_update;",
+    "DROP TRIGGER IF EXISTS store_cart_touch_delete;",
+]
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_product_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='last_activity',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunSQL("UPDATE store_cart SET last_activity = created_at;", migrations.RunSQL.noop),
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_SQL, SQLITE_SQL),
+            run_for_vendor(POSTGRESQL_REVERSE_SQL, SQLITE_REVERSE_SQL),
+        ),
+    ]
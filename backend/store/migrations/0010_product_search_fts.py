@@ -0,0 +1,66 @@
+from django.db import migrations
+
+
+# SQLite counterpart of the PostgreSQL search_vector (0002): an external-content FTS5
+# table over store_product, kept in sync by triggers. A later migration that makes
+# SQLite rebuild store_product drops these triggers and must re-create them.
+SQLITE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER store_product_fts_insert AFTER INSERT ON store_product
+    BEGIN
+        INSERT INTO store_product_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER store_product_fts_delete AFTER DELETE ON store_product
+    BEGIN
+        INSERT INTO store_product_fts (store_product_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER store_product_fts_update AFTER UPDATE OF title, description ON store_product
+    BEGIN
+        INSERT INTO store_product_fts (store_product_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO store_product_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+    """,
+]
+
+SQLITE_SQL = [
+    """
+    CREATE VIRTUAL TABLE store_product_fts USING fts5(
+        title, description, content='store_product', content_rowid='id', tokenize='porter unicode61'
+    );
+    """,
+] + SQLITE_TRIGGERS_SQL + [
+    "INSERT INTO store_product_fts (store_product_fts) VALUES ('rebuild');",
+]
+
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_product_fts_insert;",
+    "DROP TRIGGER IF EXISTS store_product_fts_delete;",
+    "DROP TRIGGER IF EXISTS store_product_fts_update;",
+    "DROP TABLE IF EXISTS store_product_fts;",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_cart_last_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(SQLITE_SQL), run_on_sqlite(SQLITE_REVERSE_SQL)),
+    ]
@@ -0,0 +1,186 @@
+from importlib import import_module
+
+from django.db import migrations
+
+import store.models
+
+
+# effective_price moves from Python signals (0007) into the database: triggers recompute it
+# when a product's unit_price changes, when promotions are linked or unlinked, and when a
+# promotion's discount changes, so bulk_create, QuerySet.update() and raw SQL keep it current.
+
+POSTGRESQL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION store_product_effective_price(product bigint, price numeric) RETURNS numeric AS $$
+        SELECT GREATEST(ROUND(price * (1 - COALESCE(MAX(promotion.discount), 0)::numeric(5, 4)), 2), 0)
+        FROM store_product_promotions link JOIN store_promotion promotion ON promotion.id = link.promotion_id
+        WHERE link.product_id = product
+    $$ LANGUAGE sql STABLE;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION store_product_price_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.effective_price := store_product_effective_price(NEW.id, NEW.unit_price);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_product_price_trigger
+    BEFORE INSERT OR UPDATE OF unit_price ON store_product
+    FOR EACH ROW EXECUTE FUNCTION store_product_price_update();
+    """,
+    """
+    CREATE OR REPLACE FUNCTION store_product_promotions_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE store_product SET effective_price = store_product_effective_price(id, unit_price), last_update = now()
+            WHERE id = OLD.product_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE store_product SET effective_price = store_product_effective_price(id, unit_price), last_update = now()
+            WHERE id = NEW.product_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_product_promotions_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON store_product_promotions
+    FOR EACH ROW EXECUTE FUNCTION store_product_promotions_update();
+    """,
+    """
+    CREATE OR REPLACE FUNCTION store_promotion_discount_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE store_product SET effective_price = store_product_effective_price(id, unit_price), last_update = now()
+        WHERE id IN (SELECT product_id FROM store_product_promotions WHERE promotion_id = NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER store_promotion_discount_trigger
+    AFTER UPDATE OF discount ON store_promotion
+    FOR EACH ROW WHEN (OLD.discount IS DISTINCT FROM NEW.discount)
+    EXECUTE FUNCTION store_promotion_discount_update();
+    """,
+]
+
+POSTGRESQL_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_product_price_trigger ON store_product;",
+    "DROP TRIGGER IF EXISTS store_product_promotions_trigger ON store_product_promotions;",
+    "DROP TRIGGER IF EXISTS store_promotion_discount_trigger ON store_promotion;",
+    "DROP FUNCTION IF EXISTS store_product_price_update();",
+    "DROP FUNCTION IF EXISTS store_product_promotions_update();",
+    "DROP FUNCTION IF EXISTS store_promotion_discount_update();",
+    "DROP FUNCTION IF EXISTS store_product_effective_price(bigint, numeric);",
+]
+
+
+def sqlite_price(product, price):
+    return f"""
+        MAX(ROUND({price} * (1 - COALESCE((
+            SELECT ROUND(MAX(promotion.discount), 4)
+            FROM store_product_promotions AS link JOIN store_promotion AS promotion ON promotion.id = link.promotion_id
+            WHERE link.product_id = {product}
+        ), 0)), 2), 0)
+    """
+
+
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+SQLITE_REPRICE = f"UPDATE store_product SET effective_price = {sqlite_price('store_product.id', 'store_product.unit_price')}, last_update = {SQLITE_NOW}"
+# new rows arrive with effective_price = unit_price (store.models.EffectivePriceField), so this rarely writes
+SQLITE_PRICE_CHECK = f"""
+    WHEN NEW.effective_price IS NOT {sqlite_price('NEW.id', 'NEW.unit_price')}
+    BEGIN UPDATE store_product SET effective_price = {sqlite_price('store_product.id', 'store_product.unit_price')} WHERE id = NEW.id; END;
+"""
+
+# like every trigger on or referring to store_product, a later migration that makes SQLite
+# rebuild the table must drop these first (the promotions ones) and re-create them after
+SQLITE_SQL = [
+    f"CREATE TRIGGER store_product_price_insert AFTER INSERT ON store_product {SQLITE_PRICE_CHECK}",
+    f"CREATE TRIGGER store_product_price_update AFTER UPDATE OF unit_price ON store_product {SQLITE_PRICE_CHECK}",
+    f"CREATE TRIGGER store_product_promotions_insert AFTER INSERT ON store_product_promotions BEGIN {SQLITE_REPRICE} WHERE id = NEW.product_id; END;",
+    f"CREATE TRIGGER store_product_promotions_delete AFTER DELETE ON store_product_promotions BEGIN {SQLITE_REPRICE} WHERE id = OLD.product_id; END;",
+    f"""
+    CREATE TRIGGER store_product_promotions_update AFTER UPDATE ON store_product_promotions
+    BEGIN {SQLITE_REPRICE} WHERE id IN (OLD.product_id, NEW.product_id); END;
+    """,
+    f"""
+    CREATE TRIGGER store_promotion_discount_update AFTER UPDATE OF discount ON store_promotion
+    WHEN OLD.discount IS NOT NEW.discount
+    BEGIN {SQLITE_REPRICE} WHERE id IN (SELECT product_id FROM store_product_promotions WHERE promotion_id = NEW.id); END;
+    """,
+]
+
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS store_product_price_insert;",
+    "DROP TRIGGER IF EXISTS store_product_price_update;",
+    "DROP TRIGGER IF EXISTS store_product_promotions_insert;",
+    "DROP TRIGGER IF EXISTS store_product_promotions_delete;",
+    "DROP TRIGGER IF EXISTS store_product_promotions_update;",
+    "DROP TRIGGER IF EXISTS store_promotion_discount_update;",
+]
+
+BACKFILL_SQL = {
+    'postgresql': """
+        UPDATE store_product SET effective_price = GREATEST(ROUND(unit_price * (1 - COALESCE((
+            SELECT MAX(promotion.discount)
+            FROM store_product_promotions link JOIN store_promotion promotion ON promotion.id = link.promotion_id
+            WHERE link.product_id = store_product.id
+        ), 0)::numeric(5, 4)), 2), 0);
+    """,
+    'sqlite': f"UPDATE store_product SET effective_price = {sqlite_price('store_product.id', 'store_product.unit_price')};",
+}
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def backfill(apps, schema_editor):
+    # 0007's signals left NULL behind bulk_create and stale prices behind QuerySet.update()
+    statement = BACKFILL_SQL.get(schema_editor.connection.vendor)
+    if statement:
+        schema_editor.execute(statement)
+
+
+# SQLite rebuilds store_product for the AlterField. That drops the triggers defined on it, and
+# fails while triggers on other tables (the review aggregates of 0008) still refer to it.
+def sqlite_referring_triggers():
+    return import_module('store.migrations.0008_product_review_aggregates')
+
+
+def sqlite_product_triggers():
+    products_count = import_module('store.migrations.0004_collection_review_last_update')
+    search = import_module('store.migrations.0010_product_search_fts')
+    return products_count.sqlite_triggers(touch=True) + search.SQLITE_TRIGGERS_SQL + sqlite_referring_triggers().SQLITE_SQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_product_search_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor([], sqlite_referring_triggers().SQLITE_REVERSE_SQL),
+            run_for_vendor([], sqlite_product_triggers()),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='effective_price',
+            field=store.models.EffectivePriceField(decimal_places=2, editable=False, max_digits=6),
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_SQL, sqlite_product_triggers() + SQLITE_SQL),
+            run_for_vendor(POSTGRESQL_REVERSE_SQL, SQLITE_REVERSE_SQL + sqlite_referring_triggers().SQLITE_REVERSE_SQL),
+        ),
+    ]
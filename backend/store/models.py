@@ -1,11 +1,19 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from uuid import uuid4
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 
 class User(AbstractUser):
     email = models.EmailField(unique=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Customer.Meta.ordering sorts through this join
+            models.Index(fields=['first_name', 'last_name'], name='store_user_name_idx'),
+        ]
+
 class Customer(models.Model):
     MEMBERSHIP_BRONZE = 'B'
     MEMBERSHIP_SILVER = 'S'
@@ -34,10 +42,25 @@ class Promotion(models.Model):
     discount = models.FloatField()
 
 
+class EffectivePriceField(models.DecimalField):
+    """
+    Starts every new row at its unit_price, which is right until promotions are linked; from
+    then on database triggers keep it current (see migration 0011). Runs for bulk_create too.
+    """
+
+    def pre_save(self, model_instance, add):
+        if add:
+            setattr(model_instance, self.attname, model_instance.unit_price)
+        return super().pre_save(model_instance, add)
+
+
 class Collection(models.Model):
     title = models.CharField(max_length=255)
     featured_product = models.ForeignKey(
         'Product', on_delete=models.SET_NULL, null=True, related_name='+')
+    # kept in sync by database triggers on store_product (see migration 0003)
+    products_count = models.PositiveIntegerField(default=0, editable=False)
+    last_update = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
@@ -45,13 +68,45 @@ class Collection(models.Model):
 
 class Product(models.Model):
     title = models.CharField(max_length=255)
-    slug = models.SlugField()
+    slug = models.SlugField(unique=True)
     description = models.TextField(null=True, blank=True)
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    # unit_price after the best promotion discount, maintained by database triggers (see migration 0011)
+    effective_price = EffectivePriceField(max_digits=6, decimal_places=2, editable=False)
     inventory = models.IntegerField()
     last_update = models.DateTimeField(auto_now=True)
     collection = models.ForeignKey(Collection, on_delete=models.PROTECT, related_name='products')
     promotions = models.ManyToManyField(Promotion)
+    # kept in sync by database triggers on store_review (see migration 0008)
+    reviews_count = models.PositiveIntegerField(default=0, editable=False)
+    last_review_date = models.DateField(null=True, editable=False)
+    # maintained by a database trigger on PostgreSQL (see migration 0002), GIN indexed
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_unit_price = instance.__dict__.get('unit_price')   #see store.signals.product_saved
+        return instance
+
+    class Meta:
+        indexes = [
+            # ProductFilter: collection_id exact + unit_price gt/lt
+            models.Index(fields=['collection', 'unit_price'], name='store_prod_coll_price_idx'),
+            # OrderingFilter / keyset pagination (tie-broken on id)
+            models.Index(fields=['unit_price', 'id'], name='store_prod_price_id_idx'),
+            models.Index(fields=['last_update', 'id'], name='store_prod_updated_id_idx'),
+            # MAX(last_update) per collection for conditional GETs
+            models.Index(fields=['collection', 'last_update'], name='store_prod_coll_updated_idx'),
+            # price-range filters and sorting on discounted prices
+            models.Index(fields=['effective_price', 'id'], name='store_prod_eff_price_idx'),
+            models.Index(fields=['collection', 'effective_price'], name='store_prod_coll_eff_price_idx'),
+            # "most reviewed" listings
+            models.Index(fields=['reviews_count', 'id'], name='store_prod_reviews_idx'),
+        ]
 
 
 
@@ -76,6 +131,13 @@ class Order(models.Model):
         permissions = [
             ('cancel_order', 'Can Cancel Order')
         ]
+        indexes = [
+            models.Index(
+                fields=['placed_at'],
+                name='store_order_pending_idx',
+                condition=models.Q(payment_status='P'),
+            ),
+        ]
 
 
 class OrderItem(models.Model):
@@ -95,6 +157,8 @@ class Address(models.Model):
 class Cart(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4)
     created_at = models.DateTimeField(auto_now_add=True)
+    # touched by triggers on every store_cartitem write (see migration 0009); drives purge_expired_carts
+    last_activity = models.DateTimeField(default=timezone.now, db_index=True)
 
 
 class CartItem(models.Model):
@@ -111,4 +175,11 @@ class Review(models.Model):
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='reviews')
     name = models.CharField(max_length=255)
     description = models.TextField()
-    date = models.DateField(auto_now_add=True)
\ No newline at end of file
+    date = models.DateField(auto_now_add=True)
+    last_update = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # reviews are always listed per product by date; last_update is carried for ETags
+            models.Index(fields=['product', 'date'], include=['last_update'], name='store_review_prod_date_idx'),
+        ]
\ No newline at end of file
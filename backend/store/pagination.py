@@ -1,4 +1,190 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 class DefaultPagination(PageNumberPagination):
-    page_size = 10
\ No newline at end of file
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek-based pagination: each page is fetched with a WHERE on the last seen
+    ordering values instead of an OFFSET, so deep pages cost the same as the first.
+
+    The ordering comes from the queryset (i.e. whatever OrderingFilter applied) and
+    is always tie-broken on `id`. Nullable columns cannot be seeked past reliably
+    (NULLs sort differently per database) and are rejected with 400. No COUNT(*)
+    runs unless the client sends ?count=true.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    tie_breaker = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+    nullable_ordering_message = 'Cursor pagination cannot order by {field}, which may be empty.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor is not None and cursor['r']
+        ordering = [self.flip(field) for field in self.ordering] if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, cursor['v']))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_ordering(self, queryset):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if self.tie_breaker not in [field.lstrip('-') for field in ordering]:
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append(f'-{self.tie_breaker}' if descending else self.tie_breaker)
+        for field in ordering:
+            model_field = self.get_model_field(queryset.model, field)
+            if model_field is not None and model_field.null:
+                raise ValidationError({'ordering': [self.nullable_ordering_message.format(field=field.lstrip('-'))]})
+        return ordering
+
+    def get_model_field(self, model, field):
+        # None for annotations such as the search rank
+        try:
+            return model._meta.get_field(field.lstrip('-'))
+        except FieldDoesNotExist:
+            return None
+
+    def flip(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def seek_filter(self, ordering, values):
+        # Lexicographic "row comes after (v0, v1, ...)" built as
+        # f0 >= v0 AND ((f0 > v0) OR (f0 = v0 AND f1 > v1) OR ...)
+        # The redundant leading bound is what the planner can use as an index
+        # condition; the OR alone makes it scan from the start of the index.
+        clauses = []
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equals = {ordering[j].lstrip('-'): values[j] for j in range(i)}
+            clauses.append(Q(**equals, **{f'{name}__{lookup}': values[i]}))
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+        return bound & reduce(or_, clauses)
+
+    def position(self, instance):
+        return [str(getattr(instance, field.lstrip('-'))) for field in self.ordering]
+
+    def encode_cursor(self, instance, reverse):
+        raw = json.dumps({'o': self.ordering, 'v': self.position(instance), 'r': reverse})
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            if cursor['o'] != self.ordering or len(cursor['v']) != len(self.ordering):
+                raise ValueError
+            cursor['v'] = [
+                value if model_field is None else model_field.to_python(value)
+                for model_field, value in zip((self.get_model_field(model, field) for field in self.ordering), cursor['v'])
+            ]
+            if None in cursor['v']:
+                raise ValueError
+            cursor['r'] = bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+
+def estimated_row_count(queryset):
+    """
+    PostgreSQL's planner estimate (pg_class.reltuples) for an unfiltered queryset,
+    or None when the queryset is filtered, the table was never analyzed, or the
+    database has no such statistic.
+    """
+    query = queryset.query
+    if query.where or query.distinct or query.combinator:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that skips the exact COUNT(*) on large unfiltered tables and
+    uses the planner estimate instead; the page count is approximate, so the last
+    pages may come back short. Filtered or small changelists are counted exactly.
+    """
+    exact_count_threshold = 10_000
+
+    @cached_property
+    def count(self):
+        estimate = estimated_row_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
@@ -0,0 +1,31 @@
+from core.db import pin_database, replica_health, wrote_recently
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin: serve list and retrieve from a read replica.
+
+    Listed first among the bases, so the replica is chosen after authentication and
+    permission checks ran on the primary and stays pinned for everything the action
+    reads (conditional-GET validators, cache fill, pagination count, rows). Falls back
+    to the primary when no replica is within MAX_LAG_SECONDS, or for a client that
+    wrote in the last READ_AFTER_WRITE_SECONDS (core.middleware.ReadAfterWriteMiddleware),
+    so writers read their own changes while everyone else stays on the replicas.
+    """
+
+    def get_read_database(self, request):
+        if request.method not in ('GET', 'HEAD') or wrote_recently(request):
+            return None
+        return replica_health.pick()
+
+    def read_from_replica(self, request, render):
+        with pin_database(self.get_read_database(request)) as alias:
+            response = render()
+        response['X-Database'] = alias or 'primary'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.read_from_replica(request, lambda: super(ReplicaReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.read_from_replica(request, lambda: super(ReplicaReadMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,67 @@
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+SEARCH_CONFIG = 'english'
+
+# SQLite: the FTS5 mirror from migration 0010, joined to store_product on rowid so the
+# MATCH runs once and bm25() is read from the matching row (a correlated subquery per
+# product would re-run the MATCH for every row). bm25() is lower-is-better, so it is
+# negated to sort like SearchRank. Column weights follow the A (title) / B (description)
+# weights of the PostgreSQL search_vector.
+FTS_TABLE = 'store_product_fts'
+FTS_JOIN_SQL = 'store_product_fts.rowid = store_product.id'
+FTS_MATCH_SQL = 'store_product_fts MATCH %s'
+FTS_RANK_SQL = '-bm25(store_product_fts, 1.0, 0.4)'
+
+
+def parse_search_terms(value):
+    return re.findall(r'\w+', value.replace('\x00', ''))
+
+
+def search_products(queryset, terms, fields=('title',)):
+    """Filter to products matching every term (as a prefix), annotated with and ordered by rank."""
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+        return queryset.filter(search_vector=query) \
+            .annotate(rank=SearchRank(F('search_vector'), query)) \
+            .order_by('-rank')
+    if vendor == 'sqlite':
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            select={'rank': FTS_RANK_SQL}, tables=[FTS_TABLE], where=[FTS_JOIN_SQL, FTS_MATCH_SQL], params=[match],
+        ).order_by('-rank')
+    # unranked: icontains over the given fields
+    return queryset.filter(reduce(and_, [
+        reduce(or_, [Q(**{f'{field}__icontains': term}) for field in fields])
+        for term in terms
+    ]))
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over the product title and description: Product.search_vector on
+    PostgreSQL (kept current by a database trigger, see migration 0002) and an FTS5
+    table on SQLite (migration 0010). Every term is matched as a prefix and results
+    come back ranked unless the client asked for an explicit ordering.
+
+    Other databases fall back to icontains over the view's search_fields.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def get_search_terms(self, request):
+        return parse_search_terms(request.query_params.get(self.search_param, ''))
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'search_fields', None) or ['title']
+        return search_products(queryset, self.get_search_terms(request), fields)
@@ -1,14 +1,17 @@
 from rest_framework import serializers
-from .models import Product, Collection, Review, Cart, CartItem, Customer
+from .models import Product, Collection, Review, Cart, CartItem, Customer, Order, OrderItem
 from decimal import Decimal
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
+from .carts import MAX_QUANTITY, QuantityLimitExceeded, upsert_cart_items
+from .fieldsets import SparseFieldsMixin
+from .checkout import CheckoutError, place_order
 
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     class Meta(BaseUserCreateSerializer.Meta):
         fields = ['id', 'username', 'email', 'password', 'first_name', 'last_name']
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_id = serializers.IntegerField()
     
     class Meta:
@@ -16,7 +19,7 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = ['id', 'user_id', 'phone', 'birth_date', 'membership']
 
 
-class CollectionSerializer(serializers.ModelSerializer):
+class CollectionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     products_count = serializers.IntegerField(read_only=True)
     
     class Meta:
@@ -26,14 +29,15 @@ class CollectionSerializer(serializers.ModelSerializer):
 
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = ['id', 'title', 'slug', 'description', 'unit_price', 'inventory', 'collection']
-        read_only_fields = ['id']
+        fields = ['id', 'title', 'slug', 'description', 'unit_price', 'effective_price', 'inventory', 'collection',
+                  'reviews_count', 'last_review_date']
+        read_only_fields = ['id', 'effective_price', 'reviews_count', 'last_review_date']
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ['id', 'name', 'description', 'date']
@@ -48,7 +52,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 class CartItemProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = ['id', 'title', 'unit_price'] 
+        fields = ['id', 'title', 'unit_price', 'effective_price'] 
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -56,7 +60,9 @@ class CartItemSerializer(serializers.ModelSerializer):
     total_price = serializers.SerializerMethodField()
 
     def get_total_price(self, cart_item:CartItem):
-        return cart_item.quantity * cart_item.product.unit_price
+        if hasattr(cart_item, 'total_price'):   #annotated by store.carts.cart_items_queryset
+            return cart_item.total_price
+        return cart_item.quantity * cart_item.product.effective_price
 
     class Meta:
         model = CartItem
@@ -64,13 +70,15 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
     items = CartItemSerializer(many=True, read_only=True)
     total_price = serializers.SerializerMethodField()
 
     def get_total_price(self, cart):
-        return sum([item.quantity * item.product.unit_price for item in cart.items.all()])
+        if hasattr(cart, 'total_price'):   #annotated by store.carts.carts_with_totals
+            return cart.total_price
+        return sum([item.quantity * item.product.effective_price for item in cart.items.all()])
 
     class Meta:
         model = Cart
@@ -80,26 +88,56 @@ class CartSerializer(serializers.ModelSerializer):
 class AddCartItemSerializer(serializers.ModelSerializer):
     product_id = serializers.IntegerField()
 
-    def save(self, **kwargs):   #AddCartItemSerializer, you overrode save() to decide whether to update or create a CartItem.
+    def validate_product_id(self, value):
+        if not Product.objects.filter(pk=value).exists():
+            raise serializers.ValidationError('No product with the given ID was found.')
+        return value
+
+    def save(self, **kwargs):   #single INSERT ... ON CONFLICT DO UPDATE, see store.carts.upsert_cart_items
         cart_id = self.context['cart_id']
         product_id = self.validated_data['product_id']
         quantity = self.validated_data['quantity']
 
         try:
-            #update an existing item
-            cart_item = CartItem.objects.get(cart_id=cart_id, product_id=product_id)
-            cart_item.quantity += quantity
-            cart_item.save()
-            self.instance = cart_item
-        except CartItem.DoesNotExist:
-            #create a new item
-            self.instance = CartItem.objects.create(cart_id=cart_id, **self.validated_data)
-
+            self.instance = upsert_cart_items(cart_id, {product_id: quantity})[product_id]
+        except QuantityLimitExceeded:
+            raise serializers.ValidationError({'quantity': [f'The cart can hold at most {MAX_QUANTITY} of this product.']})
         return self.instance
 
     class Meta:
         model = CartItem
         fields = ['id', 'product_id', 'quantity']
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product = CartItemProductSerializer()
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'unit_price', 'quantity']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, source='orderitem_set')
+
+    class Meta:
+        model = Order
+        fields = ['id', 'customer', 'placed_at', 'payment_status', 'items']
+
+
+class CreateOrderSerializer(serializers.Serializer):
+    cart_id = serializers.UUIDField()
+
+    def save(self, **kwargs):   #see store.checkout.place_order
+        try:
+            return place_order(self.validated_data['cart_id'], self.context['customer'])
+        except CheckoutError as error:
+            raise serializers.ValidationError({'cart_id': [str(error)]})
+
+
+class BulkCartItemSerializer(serializers.Serializer):   #one row of a bulk add; product ids are checked together in the view
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=MAX_QUANTITY)
        
 
 
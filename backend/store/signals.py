@@ -0,0 +1,82 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .caching import bump_catalog_version
+from .carts import invalidate_carts
+from .models import Cart, CartItem, Collection, Product, Promotion, Review, User
+
+
+def invalidate_product_carts(product_ids):
+    """
+    Drop cached carts that embed these products' prices. The prices themselves are
+    repriced by database triggers (migration 0011) before this runs.
+    """
+    product_ids = list(product_ids)
+    if product_ids:
+        invalidate_carts(*CartItem.objects.filter(product_id__in=product_ids).values_list('cart_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # password changes and deactivation both go through save()
+    invalidate_cached_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def cart_item_changed(sender, instance, **kwargs):
+    invalidate_carts(instance.cart_id)
+
+
+@receiver(post_delete, sender=Cart)
+def cart_deleted(sender, instance, **kwargs):
+    invalidate_carts(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    # only a changed unit_price moves effective_price, which cached carts embed; other saves cost nothing here
+    if created or getattr(instance, '_loaded_unit_price', None) == instance.unit_price:
+        return
+    instance.refresh_from_db(fields=['effective_price'])
+    instance._loaded_unit_price = instance.unit_price
+    invalidate_product_carts([instance.pk])
+
+
+@receiver(post_save, sender=Promotion)
+def promotion_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_product_carts(Product.objects.filter(promotions=instance).values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Promotion)
+def promotion_deleting(sender, instance, **kwargs):
+    instance._repriced_product_ids = list(instance.product_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Promotion)
+def promotion_deleted(sender, instance, **kwargs):
+    invalidate_product_carts(getattr(instance, '_repriced_product_ids', []))
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Collection)
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver([post_save, post_delete], sender=Review)   #reviews_count / last_review_date are in the product payload
+def catalog_changed(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Product.promotions.through)
+def product_promotions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:   #promotion.product_set.clear(): remember who loses it
+        instance._repriced_product_ids = list(instance.product_set.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_product_carts([instance.pk])
+    elif action == 'post_clear':
+        invalidate_product_carts(getattr(instance, '_repriced_product_ids', []))
+    else:
+        invalidate_product_carts(pk_set or [])
+    bump_catalog_version()
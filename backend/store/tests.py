@@ -1,3 +1,977 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import re
+import threading
+from base64 import urlsafe_b64encode
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from uuid import uuid4
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.renderers import FastJSONRenderer
+
+from . import benchmark
+from .authentication import CachedJWTAuthentication, user_cache_key
+from .caching import catalog_cache_stats
+from .carts import MAX_QUANTITY, _increment_cart_items, cart_cache_key, carts_with_totals
+from .checkout import (
+    CheckoutError, EmptyCart, OutOfStock, expired_reservations, place_order, release_order, reservation_ttl,
+)
+from .compiled import compile_serializer
+from .importer import import_products
+from .management.commands.explain_hot_queries import check_plans, full_scans
+from .models import Cart, CartItem, Collection, Customer, Order, OrderItem, Product, Promotion, Review, User
+from .search import search_products
+from .serializers import CartSerializer, CollectionSerializer, ProductSerializer, ReviewSerializer
+
+
+def run_in_threads(target, arguments):
+    """Call target(argument) for each argument at the same moment, one thread and connection each."""
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+
+    def worker(index, argument):
+        try:
+            barrier.wait()
+            results[index] = target(argument)
+        except Exception as error:
+            results[index] = error
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=pair) for pair in enumerate(arguments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class ImportProductsTests(TestCase):
+    def setUp(self):
+        self.collection = Collection.objects.create(title='Tools')
+
+    def run_import(self, *rows):
+        header = 'title,slug,unit_price,inventory,collection_id\n'
+        lines = ''.join(f'{title},{slug},10,5,{self.collection.pk}\n' for title, slug in rows)
+        return import_products(StringIO(header + lines), 'csv')
+
+    def test_long_title_gets_a_truncated_slug(self):
+        title = 'Stainless steel adjustable wrench with ergonomic rubber grip'
+        stats = self.run_import((title, ''))
+        self.assertEqual(stats.imported, 1)
+        self.assertEqual(Product.objects.get().slug, 'stainless-steel-adjustable-wrench-with-ergonomic-r')
+
+    def test_invalid_rows_are_rejected_without_aborting_the_import(self):
+        stats = self.run_import(
+            ('T' * 256, ''),
+            ('Hammer', 'h' * 51),
+            ('Saw', 'not a slug'),
+            ('!!!', ''),
+            ('Drill', 'drill'),
+        )
+        self.assertEqual((stats.imported, stats.rejected), (1, 4))
+        self.assertEqual([error['line'] for error in stats.errors], [2, 3, 4, 5])
+        self.assertEqual(list(Product.objects.values_list('slug', flat=True)), ['drill'])
+
+    def test_duplicate_slugs_in_a_batch_are_counted_as_superseded(self):
+        stats = self.run_import(('Saw', 'saw'), ('Drill', 'drill'), ('Hacksaw', 'saw'), ('', 'bad'))
+        self.assertEqual((stats.imported, stats.superseded, stats.rejected), (2, 1, 1))
+        self.assertEqual(Product.objects.get(slug='saw').title, 'Hacksaw')
+
+    def test_promotions_reprice_imported_products(self):
+        promotion = Promotion.objects.create(description='Spring', discount=0.2)
+        body = f'title,slug,unit_price,inventory,collection_id,promotions\nSaw,saw,10,5,{self.collection.pk},{promotion.pk}\n'
+        import_products(StringIO(body), 'csv')
+        import_products(StringIO(body.replace(',10,', ',20,')), 'csv')   #the update keeps the discount
+        self.assertEqual(Product.objects.get().effective_price, 16)
+
+    def test_upload_through_the_api(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile('products.csv', (
+            'title,slug,description,unit_price,inventory,collection_id\r\n'
+            f'Saw,saw,"Cuts wood,\r\nand plastic",9.50,3,{self.collection.pk}\r\n'
+            f'Drill,drill,,40,1,{self.collection.pk}\r\n'
+            f'Broken,broken,,free,1,{self.collection.pk}\r\n'
+        ).encode(), content_type='text/csv')
+
+        response = client.post('/store/products/import/', {'file': upload, 'import_format': 'csv'}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({key: response.json()[key] for key in ('imported', 'superseded', 'rejected')},
+                         {'imported': 2, 'superseded': 0, 'rejected': 1})
+        self.assertEqual(response.json()['errors'][0]['line'], 5)
+        self.assertEqual(Product.objects.get(slug='saw').description, 'Cuts wood,\r\nand plastic')
+        self.assertEqual(Product.objects.get(slug='drill').effective_price, 40)
+
+    def test_upload_requires_an_admin(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ann', 'ann@example.com', 'secret'))
+        upload = SimpleUploadedFile('products.csv', b'title\r\n', content_type='text/csv')
+        self.assertEqual(client.post('/store/products/import/', {'file': upload}, format='multipart').status_code, 403)
+
+
+class DenormalizedCounterTests(TestCase):
+    def test_triggers_keep_collection_and_review_counters(self):
+        collection = Collection.objects.create(title='Tools')
+        product = Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+        Review.objects.create(product=product, name='Ann', description='Sharp.')
+
+        collection.refresh_from_db()
+        product.refresh_from_db()
+        self.assertEqual(collection.products_count, 1)
+        self.assertEqual(product.reviews_count, 1)
+        self.assertIsNotNone(product.last_review_date)
+
+        product.delete()
+        collection.refresh_from_db()
+        self.assertEqual(collection.products_count, 0)
+
+
+class EffectivePriceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        self.saw, self.drill = Product.objects.bulk_create([
+            Product(title='Saw', slug='saw', unit_price=10, inventory=5, collection=collection),
+            Product(title='Drill', slug='drill', unit_price=40, inventory=5, collection=collection),
+        ])
+        self.promotion = Promotion.objects.create(description='Spring', discount=0.25)
+
+    def prices(self):
+        return list(Product.objects.order_by('slug').values_list('slug', 'effective_price'))
+
+    def test_triggers_follow_prices_and_promotions(self):
+        self.assertEqual(self.prices(), [('drill', 40), ('saw', 10)])
+
+        self.saw.promotions.add(self.promotion)
+        Product.objects.update(unit_price=F('unit_price') * 2)
+        self.assertEqual(self.prices(), [('drill', 80), ('saw', 15)])
+
+        self.saw.promotions.add(Promotion.objects.create(description='Clearance', discount=0.5))
+        Promotion.objects.filter(pk=self.promotion.pk).update(discount=0.6)
+        self.assertEqual(self.prices(), [('drill', 80), ('saw', 8)])
+
+        self.saw.promotions.remove(self.promotion)
+        self.assertEqual(self.prices(), [('drill', 80), ('saw', 10)])
+        self.saw.promotions.clear()
+        self.assertEqual(self.prices(), [('drill', 80), ('saw', 20)])
+
+    def test_cart_and_checkout_use_prices_changed_in_bulk(self):
+        self.saw.promotions.add(self.promotion)
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.saw, quantity=2)
+        Product.objects.filter(pk=self.saw.pk).update(unit_price=20)
+
+        self.assertEqual(carts_with_totals().get(pk=cart.pk).total_price, 30)
+        customer = Customer.objects.create(user=User.objects.create_user('ann', 'ann@example.com', 'secret'), phone='1')
+        order = place_order(cart.pk, customer)
+        self.assertEqual(list(order.orderitem_set.values_list('unit_price', flat=True)), [15])
+
+    def test_saves_reprice_in_memory_only_when_the_price_changes(self):
+        product = Product.objects.get(pk=self.saw.pk)
+        product.promotions.add(self.promotion)
+        product.inventory = 4
+        with self.assertNumQueries(1):
+            product.save()   #writes back the stale 10, which the triggers correct
+        self.assertEqual(self.prices(), [('drill', 40), ('saw', Decimal('7.50'))])
+
+        product.unit_price = 12
+        product.save()
+        self.assertEqual(product.effective_price, 9)
+
+
+class CheckoutTests(TestCase):
+    """The sequential side of ConcurrentCheckoutTests, run on every backend."""
+
+    def setUp(self):
+        collection = Collection.objects.create(title='Hot')
+        self.product = Product.objects.create(title='Hot', slug='hot', unit_price=10, inventory=3, collection=collection)
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'secret')
+        self.customer = Customer.objects.create(user=user, phone='1')
+
+    def make_cart(self, quantity=1):
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product, quantity=quantity)
+        return cart.pk
+
+    def inventory(self):
+        self.product.refresh_from_db()
+        return self.product.inventory
+
+    def test_checkout_decrements_inventory_once(self):
+        cart_id = self.make_cart(quantity=2)
+        order = place_order(cart_id, self.customer)
+
+        self.assertEqual(list(order.orderitem_set.values_list('product_id', 'quantity', 'unit_price')),
+                         [(self.product.pk, 2, self.product.unit_price)])
+        self.assertEqual(self.inventory(), 1)
+        self.assertFalse(Cart.objects.filter(pk=cart_id).exists())
+        with self.assertRaises(EmptyCart):   #a resubmit of the same cart
+            place_order(cart_id, self.customer)
+        self.assertEqual(self.inventory(), 1)
+
+    def test_oversell_is_rejected_and_rolled_back(self):
+        place_order(self.make_cart(quantity=2), self.customer)
+        cart_id = self.make_cart(quantity=2)
+        with self.assertRaises(OutOfStock):
+            place_order(cart_id, self.customer)
+
+        self.assertEqual(self.inventory(), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertTrue(CartItem.objects.filter(cart_id=cart_id).exists())
+
+    def test_release_returns_inventory_once(self):
+        order = place_order(self.make_cart(quantity=2), self.customer)
+        self.assertTrue(release_order(order.pk))
+        self.assertFalse(release_order(order.pk))
+
+        self.assertEqual(self.inventory(), 3)
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, Order.PAYMENT_STATUS_FAILED)
+
+    def test_paid_orders_are_not_released(self):
+        order = place_order(self.make_cart(quantity=2), self.customer)
+        Order.objects.filter(pk=order.pk).update(payment_status=Order.PAYMENT_STATUS_COMPLETE)
+        self.assertFalse(release_order(order.pk))
+        self.assertEqual(self.inventory(), 1)
+
+    def test_only_expired_reservations_are_released(self):
+        expired = place_order(self.make_cart(), self.customer)
+        Order.objects.filter(pk=expired.pk).update(placed_at=timezone.now() - reservation_ttl() - timedelta(minutes=1))
+        place_order(self.make_cart(), self.customer)
+        self.assertEqual(list(expired_reservations()), [expired])
+
+        call_command('release_expired_reservations', stdout=StringIO())
+        self.assertEqual(self.inventory(), 2)
+        self.assertEqual(list(expired_reservations()), [])
+        self.assertEqual(Order.objects.filter(payment_status=Order.PAYMENT_STATUS_PENDING).count(), 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    threads = 24
+
+    def setUp(self):
+        collection = Collection.objects.create(title='Hot')
+        self.product = Product.objects.create(title='Hot', slug='hot', unit_price=10, inventory=10, collection=collection)
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'secret')
+        self.customer = Customer.objects.create(user=user, phone='1')
+
+    def make_cart(self, quantity=1):
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product, quantity=quantity)
+        return cart.pk
+
+    def checkout(self, cart_id):
+        return place_order(cart_id, self.customer)
+
+    def test_parallel_checkouts_never_oversell(self):
+        results = run_in_threads(self.checkout, [self.make_cart() for _ in range(self.threads)])
+
+        orders = [result for result in results if isinstance(result, Order)]
+        failures = [result for result in results if not isinstance(result, Order)]
+        self.assertEqual(len(orders), 10)
+        self.assertTrue(all(isinstance(failure, CheckoutError) for failure in failures), failures)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 0)
+        self.assertEqual(sum(OrderItem.objects.values_list('quantity', flat=True)), 10)
+
+    def test_double_submit_of_one_cart_places_one_order(self):
+        cart_id = self.make_cart(quantity=2)
+        results = run_in_threads(self.checkout, [cart_id] * 4)
+
+        self.assertEqual(sum(isinstance(result, Order) for result in results), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 8)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        self.product = Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=7, collection=collection)
+        self.client = APIClient()
+        self.detail = f'/store/products/{self.product.pk}/'
+
+    def test_hits_and_conditional_hits_run_no_query(self):
+        for path in (self.detail, '/store/products/', '/store/collections/'):
+            etag = self.client.get(path)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(path)
+                self.assertEqual((response.status_code, response['X-Cache']), (200, 'HIT'))
+                self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_catalog_writes_move_to_a_new_version(self):
+        etag = self.client.get(self.detail)['ETag']
+        self.product.title = 'Hacksaw'
+        self.product.save()
+
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Cache']), (200, 'MISS'))
+        self.assertEqual(response.json()['title'], 'Hacksaw')
+        self.assertEqual(self.client.get(self.detail)['X-Cache'], 'HIT')
+
+    def test_hits_and_misses_are_counted(self):
+        before = catalog_cache_stats()
+        for _ in range(3):
+            self.client.get('/store/products/')
+        self.client.get(self.detail)
+        after = catalog_cache_stats()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (2, 2))
+        self.assertEqual(after['version'], before['version'])
+
+    @override_settings(CATALOG_CACHE_REFRESH_VOLATILE_FIELDS=True)
+    def test_opt_in_hits_serve_current_inventory(self):
+        etag = self.client.get(self.detail)['ETag']
+        self.client.get('/store/products/')
+        Product.objects.filter(pk=self.product.pk).update(inventory=3, last_update=timezone.now())   #as place_order does
+
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        response = self.client.get(self.detail)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['inventory'], 3)
+        response = self.client.get('/store/products/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['results'][0]['inventory'], 3)
+
+        response = self.client.get('/store/products/?fields=inventory')
+        self.assertEqual(self.client.get('/store/products/?fields=inventory')['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'], [{'inventory': 3}])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        Product.objects.bulk_create(
+            Product(title=f'P{i}', slug=f'p{i}', unit_price=i % 4, inventory=1, collection=collection)
+            for i in range(25)
+        )
+        self.client = APIClient()
+
+    def walk(self, url):
+        seen = []
+        while url:
+            body = self.client.get(url).json()
+            seen += [(row['unit_price'], row['id']) for row in body['results']]
+            url = body['next']
+        return seen
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for ordering, descending in (('unit_price', False), ('-unit_price', True)):
+            seen = self.walk(f'/store/products/?cursor=&ordering={ordering}&page_size=4')
+            self.assertEqual(len(seen), 25)
+            self.assertEqual(seen, sorted(seen, reverse=descending))
+
+    def test_effective_price_ordering(self):
+        seen = self.walk('/store/products/?cursor=&ordering=-effective_price&page_size=4')
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_nullable_ordering_is_rejected(self):
+        with mock.patch.object(Product._meta.get_field('effective_price'), 'null', True):
+            response = self.client.get('/store/products/?cursor=&ordering=effective_price')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_with_wrong_value_type_is_not_found(self):
+        cursor = urlsafe_b64encode(json.dumps({'o': ['unit_price', 'id'], 'v': ['None', '1'], 'r': False}).encode())
+        response = self.client.get(f'/store/products/?ordering=unit_price&cursor={cursor.decode()}')
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        self.products = [
+            Product.objects.create(title=f'P{i}', slug=f'p{i}', unit_price=i, inventory=1, collection=collection)
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def test_list_etag_changes_when_a_row_is_deleted(self):
+        etag = self.client.get('/store/products/')['ETag']
+        self.assertEqual(self.client.get('/store/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.products[0].delete()
+        response = self.client.get('/store/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_keyset_list_runs_no_count(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get('/store/products/?cursor=&ordering=unit_price')
+        self.assertFalse([query for query in captured if 'COUNT(' in query['sql'].upper()])
+
+
+class CartCacheTests(TestCase):
+    def test_sparse_request_does_not_poison_the_cached_cart(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        product = Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+        client = APIClient()
+
+        self.assertEqual(client.get(f'/store/carts/{cart.pk}/?fields=id').json(), {'id': str(cart.pk)})
+        self.assertEqual(set(client.get(f'/store/carts/{cart.pk}/').json()), {'id', 'items', 'total_price'})
+        self.assertEqual(client.get(f'/store/carts/{cart.pk}/?omit=items').json(), {'id': str(cart.pk), 'total_price': 10})
+
+    def test_fill_that_raced_a_write_is_never_served(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        product = Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+        cart = Cart.objects.create()
+        client = APIClient()
+
+        # a GET that read the cart just before the item was added, and stores it just after
+        key = cart_cache_key(cart.pk)
+        stale = CartSerializer(carts_with_totals().get(pk=cart.pk)).data
+        self.assertEqual(client.post(f'/store/carts/{cart.pk}/items/', {'product_id': product.pk, 'quantity': 2}).status_code, 201)
+        cache.set(key, stale)
+
+        self.assertEqual(client.get(f'/store/carts/{cart.pk}/').json()['total_price'], 10)
+
+
+class CartItemTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        self.saw = Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+        self.drill = Product.objects.create(title='Drill', slug='drill', unit_price=7, inventory=1, collection=collection)
+        self.cart = Cart.objects.create()
+        self.client = APIClient()
+
+    def add(self, product_id, quantity):
+        return self.client.post(
+            f'/store/carts/{self.cart.pk}/items/', {'product_id': product_id, 'quantity': quantity}, format='json')
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart=self.cart).values_list('product_id', 'quantity'))
+
+
+class CartItemUpsertTests(CartItemTestCase):
+    """The sequential side of ConcurrentCartItemTests, run on every backend."""
+
+    def test_repeated_adds_increment_one_row_once_each(self):
+        first, second = self.add(self.saw.pk, 2).json(), self.add(self.saw.pk, 3).json()
+        self.assertEqual(second, {'id': first['id'], 'product_id': self.saw.pk, 'quantity': 5})
+        self.add(self.drill.pk, 1)
+        self.assertEqual(self.quantities(), {self.saw.pk: 5, self.drill.pk: 1})
+
+    def test_unknown_product_is_rejected_without_a_write(self):
+        self.assertEqual(self.add(999999, 1).status_code, 400)
+        self.assertEqual(self.quantities(), {})
+
+    def test_fallback_increments_once_each(self):
+        _increment_cart_items(self.cart.pk, {self.saw.pk: 2})
+        items = _increment_cart_items(self.cart.pk, {self.saw.pk: 3, self.drill.pk: 1})
+        self.assertEqual({product_id: item.quantity for product_id, item in items.items()}, {self.saw.pk: 5, self.drill.pk: 1})
+        self.assertEqual(self.quantities(), {self.saw.pk: 5, self.drill.pk: 1})
+
+    def test_add_past_the_quantity_limit_is_rejected(self):
+        self.add(self.saw.pk, MAX_QUANTITY)
+        response = self.add(self.saw.pk, 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quantity', response.json())
+        self.assertEqual(self.quantities(), {self.saw.pk: MAX_QUANTITY})
+
+
+class BulkCartItemTests(CartItemTestCase):
+    def bulk(self, rows):
+        return self.client.post(f'/store/carts/{self.cart.pk}/items/bulk/', rows, format='json')
+
+    def test_duplicate_products_are_merged_into_existing_items(self):
+        self.add(self.saw.pk, 1)
+        response = self.bulk([
+            {'product_id': self.saw.pk, 'quantity': 2},
+            {'product_id': self.drill.pk, 'quantity': 1},
+            {'product_id': self.saw.pk, 'quantity': 3},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['errors'], [])
+        self.assertEqual(self.quantities(), {self.saw.pk: 6, self.drill.pk: 1})
+        self.assertEqual(response.json()['cart']['total_price'], 37)
+
+    def test_unknown_and_invalid_rows_are_reported_and_skipped(self):
+        response = self.bulk([
+            {'product_id': 999999, 'quantity': 1},
+            {'product_id': self.saw.pk, 'quantity': 2},
+            {'product_id': self.drill.pk, 'quantity': 0},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [0, 2])
+        self.assertEqual(self.quantities(), {self.saw.pk: 2})
+        self.assertEqual(self.bulk([{'product_id': 999999, 'quantity': 1}]).status_code, 400)
+
+    def test_merged_total_past_the_quantity_limit_writes_nothing(self):
+        self.add(self.saw.pk, MAX_QUANTITY - 10)
+        response = self.bulk([
+            {'product_id': self.drill.pk, 'quantity': 1},
+            {'product_id': self.saw.pk, 'quantity': 6},
+            {'product_id': self.saw.pk, 'quantity': 6},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2])
+        self.assertEqual(self.quantities(), {self.saw.pk: MAX_QUANTITY - 10})
+
+    def test_merged_request_past_the_quantity_limit_is_rejected(self):
+        response = self.bulk([{'product_id': self.saw.pk, 'quantity': MAX_QUANTITY}] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.quantities(), {})
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCartItemTests(TransactionTestCase):
+    increments = list(range(1, 17))
+
+    def setUp(self):
+        collection = Collection.objects.create(title='Tools')
+        self.product = Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+        self.cart = Cart.objects.create()
+
+    def quantity(self):
+        return CartItem.objects.get(cart=self.cart, product=self.product).quantity
+
+    def test_parallel_adds_lose_no_increment(self):
+        def add(quantity):
+            response = APIClient().post(
+                f'/store/carts/{self.cart.pk}/items/', {'product_id': self.product.pk, 'quantity': quantity}, format='json')
+            return response.status_code
+
+        self.assertEqual(run_in_threads(add, self.increments), [201] * len(self.increments))
+        self.assertEqual(self.quantity(), sum(self.increments))
+
+    def test_parallel_fallback_increments_lose_no_increment(self):
+        results = run_in_threads(
+            lambda quantity: _increment_cart_items(self.cart.pk, {self.product.pk: quantity}), self.increments)
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        self.assertEqual(self.quantity(), sum(self.increments))
+
+
+class CompiledSerializerTests(TestCase):
+    queries = ['', '?fields=id,effective_price,last_review_date', '?omit=description,collection', '?fields=title']
+
+    def setUp(self):
+        collection = Collection.objects.create(title='Tools')
+        reviewed = Product.objects.create(title='Saw', slug='saw', unit_price='9.99', inventory=3, collection=collection)
+        Product.objects.create(title='Nail', slug='nail', description=None, unit_price=0, inventory=0, collection=collection)
+        Review.objects.create(product=reviewed, name='Ann', description='Sharp.')
+
+    def assert_equivalent(self, serializer_class, queryset):
+        for query in self.queries:
+            with self.subTest(serializer=serializer_class.__name__, query=query):
+                request = Request(APIRequestFactory().get(f'/{query}'))
+                serializer = serializer_class(context={'request': request})
+                reader = compile_serializer(serializer)
+                self.assertIsNotNone(reader)
+                compiled = [reader(row) for row in queryset.values_list(*reader.columns)]
+                expected = serializer_class(queryset, many=True, context={'request': request}).data
+                self.assertEqual(compiled, [dict(item) for item in expected])
+                self.assertEqual([list(item) for item in compiled], [list(item) for item in expected])
+
+    def test_product_serializer(self):
+        self.assert_equivalent(ProductSerializer, Product.objects.order_by('id'))
+
+    def test_collection_serializer(self):
+        self.assert_equivalent(CollectionSerializer, Collection.objects.order_by('id'))
+
+    def test_review_serializer(self):
+        self.assert_equivalent(ReviewSerializer, Review.objects.order_by('id'))
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title='Tools')
+        # created first, so ranking (not id order) must put the wrench ahead of it
+        self.hammer = Product.objects.create(
+            title='Claw hammer', slug='hammer', description='Pairs well with a wrench.', unit_price=5, inventory=1,
+            collection=collection)
+        self.wrench = Product.objects.create(
+            title='Adjustable wrench', slug='wrench', unit_price=5, inventory=1, collection=collection)
+        Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+        self.client = APIClient()
+
+    def search(self, query):
+        return [row['id'] for row in self.client.get(f'/store/products/?search={query}').json()['results']]
+
+    def test_prefix_terms_rank_title_matches_first(self):
+        self.assertEqual(self.search('wren'), [self.wrench.pk, self.hammer.pk])
+
+    def test_terms_are_stemmed(self):
+        self.assertEqual(self.search('wrenches'), [self.wrench.pk, self.hammer.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('wren+ham'), [self.hammer.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        Product.objects.filter(pk=self.wrench.pk).update(title='Spanner')
+        self.hammer.delete()
+        self.assertEqual(self.search('wren'), [])
+        self.assertEqual(self.search('span'), [self.wrench.pk])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 mirror is SQLite-only')
+    def test_sqlite_runs_the_match_once(self):
+        sql, params = search_products(Product.objects.all(), ['wren']).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        # one MATCH over the FTS index, products looked up by rowid, no per-row subquery
+        self.assertEqual(sum('VIRTUAL TABLE' in step for step in plan), 1, plan)
+        self.assertTrue(any('store_product USING INTEGER PRIMARY KEY' in step for step in plan), plan)
+        self.assertFalse(any('SUBQUERY' in step for step in plan), plan)
+
+
+@mock.patch('core.middleware.replica_aliases', lambda: ['replica'])
+@mock.patch('store.replicas.replica_health.pick', lambda: 'default')
+class ReadAfterWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.writer, self.reader = APIClient(), APIClient()
+
+    def database(self, client):
+        return client.get('/store/products/')['X-Database']
+
+    def test_writes_pin_only_the_writing_client_to_the_primary(self):
+        response = self.writer.post('/store/carts/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies['db_primary']['max-age'], 10)
+        self.assertEqual(self.database(self.writer), 'primary')
+        self.assertEqual(self.database(self.reader), 'default')
+
+    def test_failed_writes_do_not_pin(self):
+        self.writer.post('/store/carts/00000000-0000-0000-0000-000000000000/items/', {})
+        self.assertEqual(self.database(self.writer), 'default')
+
+
+# simplejwt rebinds api_settings on SIMPLE_JWT overrides, which importers never see
+@mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ann', 'ann@example.com', 'first-password')
+        self.authentication = CachedJWTAuthentication()
+
+    def authenticate(self, token):
+        return self.authentication.get_user(self.authentication.get_validated_token(str(token)))
+
+    def test_cache_holds_no_password_hash(self):
+        self.authenticate(AccessToken.for_user(self.user))
+        values, revoke_claim = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn('password', values)
+        self.assertNotIn(self.user.password, json.dumps(values, default=str))
+
+    def test_cached_user_loads_password_on_demand_and_saves_safely(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertEqual((user.pk, user.email), (self.user.pk, 'ann@example.com'))
+        self.assertTrue(user.check_password('first-password'))
+        user.first_name = 'Ann'
+        user.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('first-password'))
+
+    def test_revoked_token_is_rejected_on_cache_hits(self):
+        old_token = AccessToken.for_user(self.user)
+        self.authenticate(old_token)
+        self.user.set_password('second-password')
+        self.user.save()
+        self.authenticate(AccessToken.for_user(self.user))   # refills the cache for the new password
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(old_token)
+
+
+class AsyncProductListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tools, garden = Collection.objects.create(title='Tools'), Collection.objects.create(title='Garden')
+        self.hammer = Product.objects.create(
+            title='Claw hammer', slug='hammer', description='Pairs well with a wrench.', unit_price=5, inventory=1,
+            collection=self.tools)
+        self.wrench = Product.objects.create(
+            title='Adjustable wrench', slug='wrench', unit_price=8, inventory=1, collection=self.tools)
+        self.rake = Product.objects.create(title='Rake', slug='rake', unit_price=12, inventory=1, collection=garden)
+        Review.objects.create(product=self.rake, name='Bo', description='Sturdy')
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_matches_the_viewset_for_filters_search_and_ordering(self):
+        for query in (f'collection_id={self.tools.pk}', 'unit_price__gt=6&ordering=-unit_price', 'reviews_count__gte=1',
+                      'search=wren', 'search=wren&ordering=unit_price'):
+            with self.subTest(query=query):
+                self.assertEqual(self.ids(f'/store/async/products/?{query}'), self.ids(f'/store/products/?{query}'))
+        self.assertEqual(self.ids('/store/async/products/?search=wren'), [self.wrench.pk, self.hammer.pk])
+
+    def test_rejects_unknown_parameters_and_invalid_values(self):
+        for query in ('colection_id=1', 'cursor=abc', 'collection_id=999999', 'unit_price__gt=cheap'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/store/async/products/?{query}').status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tools, self.garden = Collection.objects.create(title='Tools'), Collection.objects.create(title='Garden')
+        self.saw = Product.objects.create(
+            title='Saw', slug='saw', description='Cuts, "cleanly"\nand fast', unit_price=5, inventory=2,
+            collection=self.tools)
+        self.drill = Product.objects.create(title='Drill', slug='drill', unit_price=40, inventory=1, collection=self.tools)
+        self.rake = Product.objects.create(title='Rake', slug='rake', unit_price=12, inventory=9, collection=self.garden)
+        self.saw.promotions.add(Promotion.objects.create(description='Spring', discount=0.25))
+        self.client = APIClient()
+
+    def export(self, query=''):
+        response = self.client.get(f'/store/products/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.csv"')
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([row['id'] for row in rows], [str(self.saw.pk), str(self.drill.pk), str(self.rake.pk)])
+        self.assertEqual(
+            {key: rows[0][key] for key in ('description', 'unit_price', 'collection_title', 'discount')},
+            {'description': 'Cuts, "cleanly"\nand fast', 'unit_price': '5.00', 'collection_title': 'Tools', 'discount': '0.25'})
+        self.assertEqual(rows[1]['discount'], '')
+
+    def test_ndjson(self):
+        response, body = self.export('export_format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            {key: rows[0][key] for key in ('id', 'unit_price', 'collection_title', 'discount', 'collection_id')},
+            {'id': self.saw.pk, 'unit_price': 5.0, 'collection_title': 'Tools', 'discount': 0.25,
+             'collection_id': self.tools.pk})
+        self.assertIsNone(rows[1]['discount'])
+
+    def test_filters_search_and_ordering_are_honored(self):
+        def ids(query):
+            return [json.loads(line)['id'] for line in self.export(f'export_format=ndjson&{query}')[1].splitlines()]
+
+        self.assertEqual(ids(f'collection_id={self.tools.pk}&ordering=-unit_price'), [self.drill.pk, self.saw.pk])
+        self.assertEqual(ids('unit_price__gt=10'), [self.drill.pk, self.rake.pk])
+        self.assertEqual(ids('search=rake'), [self.rake.pk])
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get('/store/products/export/?export_format=xml').status_code, 400)
+
+    async def test_asgi_gets_an_async_body_with_the_same_content(self):
+        response = await self.async_client.get('/store/products/export/?export_format=ndjson')
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.saw.pk, self.drill.pk, self.rake.pk])
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=None, CART_CACHE_TIMEOUT=None)   #measure the database work, not the caches
+class QueryCountTests(TestCase):
+    """Every list and detail route runs the same queries whether it returns one row or many."""
+
+    def setUp(self):
+        self.small_collection, self.large_collection = (
+            Collection.objects.create(title='Garden'), Collection.objects.create(title='Tools'))
+        promotion = Promotion.objects.create(description='Spring', discount=0.1)
+        self.products = Product.objects.bulk_create(
+            Product(title=f'P{i}', slug=f'p{i}', unit_price=i + 1, inventory=100,
+                    collection=self.small_collection if i == 0 else self.large_collection)
+            for i in range(30)
+        )
+        self.lone_product, self.popular_product = self.products[0], self.products[1]
+        self.popular_product.promotions.add(promotion)
+        Review.objects.create(product=self.lone_product, name='Al', description='Fine')
+        Review.objects.bulk_create(
+            Review(product=self.popular_product, name=f'R{i}', description='Great') for i in range(20))
+
+        self.small_cart, self.large_cart = Cart.objects.create(), Cart.objects.create()
+        CartItem.objects.create(cart=self.small_cart, product=self.lone_product, quantity=1)
+        CartItem.objects.bulk_create(CartItem(cart=self.large_cart, product=product, quantity=2) for product in self.products)
+
+        self.small_customer, self.large_customer = (
+            Customer.objects.create(user=User.objects.create_user(name, f'{name}@example.com', 'secret'), phone='1')
+            for name in ('ann', 'bob'))
+        self.small_order = self.place(self.small_customer, self.products[:1])
+        for _ in range(3):
+            self.large_order = self.place(self.large_customer, self.products)
+        self.client = APIClient()
+
+    def place(self, customer, products):
+        order = Order.objects.create(customer=customer)
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=1, unit_price=product.unit_price) for product in products)
+        return order
+
+    def count_queries(self, path, user=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        return len(captured)
+
+    def assertFlat(self, small, large, small_user=None, large_user=None):
+        expected = self.count_queries(small, small_user)
+        self.client.force_authenticate(large_user)
+        with self.assertNumQueries(expected):
+            self.assertEqual(self.client.get(large).status_code, 200, large)
+
+    def test_product_routes(self):
+        self.assertFlat('/store/products/?page_size=1', '/store/products/?page_size=30')
+        self.assertFlat('/store/products/?cursor=&ordering=unit_price&page_size=1',
+                        '/store/products/?cursor=&ordering=unit_price&page_size=30')
+        self.assertFlat('/store/products/?search=p1&page_size=1', '/store/products/?search=p1&page_size=30')
+        self.assertFlat(f'/store/products/{self.lone_product.pk}/', f'/store/products/{self.popular_product.pk}/')
+
+    def test_review_routes(self):
+        self.assertFlat(f'/store/products/{self.lone_product.pk}/reviews/',
+                        f'/store/products/{self.popular_product.pk}/reviews/')
+        lone, popular = (Review.objects.filter(product=product).first() for product in (self.lone_product, self.popular_product))
+        self.assertFlat(f'/store/products/{self.lone_product.pk}/reviews/{lone.pk}/',
+                        f'/store/products/{self.popular_product.pk}/reviews/{popular.pk}/')
+
+    def test_collection_routes(self):
+        lists = ('/store/collections/', '/store/async/collections/')
+        expected = [self.count_queries(path) for path in lists]
+        Collection.objects.bulk_create(Collection(title=f'C{i}') for i in range(20))   #these lists are not paginated
+        for path, queries in zip(lists, expected):
+            with self.assertNumQueries(queries):
+                self.client.get(path)
+        self.assertFlat(f'/store/collections/{self.small_collection.pk}/', f'/store/collections/{self.large_collection.pk}/')
+
+    def test_cart_routes(self):
+        self.assertFlat(f'/store/carts/{self.small_cart.pk}/', f'/store/carts/{self.large_cart.pk}/')
+        self.assertFlat(f'/store/carts/{self.small_cart.pk}/items/', f'/store/carts/{self.large_cart.pk}/items/')
+        item = CartItem.objects.filter(cart=self.large_cart).first()
+        self.assertFlat(f'/store/carts/{self.small_cart.pk}/items/{self.small_cart.items.get().pk}/',
+                        f'/store/carts/{self.large_cart.pk}/items/{item.pk}/')
+
+    def test_order_routes(self):
+        small_user, large_user = self.small_customer.user, self.large_customer.user
+        self.assertFlat('/store/orders/', '/store/orders/', small_user, large_user)
+        self.assertFlat(f'/store/orders/{self.small_order.pk}/', f'/store/orders/{self.large_order.pk}/',
+                        small_user, large_user)
+
+    def test_customer_route(self):
+        self.assertFlat(f'/store/customers/{self.small_customer.pk}/', f'/store/customers/{self.large_customer.pk}/')
+
+    def test_async_routes(self):
+        self.assertFlat('/store/async/products/?page_size=1', '/store/async/products/?page_size=30')
+        self.assertFlat(f'/store/async/products/{self.lone_product.pk}/',
+                        f'/store/async/products/{self.popular_product.pk}/')
+        self.assertFlat(f'/store/async/collections/{self.small_collection.pk}/',
+                        f'/store/async/collections/{self.large_collection.pk}/')
+        self.assertFlat(f'/store/async/carts/{self.small_cart.pk}/', f'/store/async/carts/{self.large_cart.pk}/')
+
+
+class HotQueryPlanTests(TestCase):
+    def test_full_scans_are_found_next_to_index_scans(self):
+        sqlite_plan = ('SCAN store_user USING COVERING INDEX store_user_name_idx\n'
+                       'SCAN store_customer\n'
+                       'SEARCH store_order USING INDEX store_order_pending_idx (payment_status=?)')
+        postgres_plan = ('Nested Loop\n  ->  Index Scan using store_user_name_idx on store_user\n'
+                         '  ->  Seq Scan on store_customer\n        Filter: (user_id = store_user.id)')
+        self.assertEqual(full_scans(sqlite_plan, 'sqlite'), {'store_customer'})
+        self.assertEqual(full_scans(postgres_plan, 'postgresql'), {'store_customer'})
+        self.assertEqual(full_scans('SCAN store_product USING INDEX store_prod_price_id_idx', 'sqlite'), set())
+
+    def test_hot_queries_scan_no_table(self):
+        ids = benchmark.seed(products=2_000, collections=200, carts=1, customers=1_000, orders=5_000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        for name, plan, scanned in check_plans(ids, connection.vendor):
+            with self.subTest(name):
+                self.assertEqual(scanned, set(), plan)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=None)
+class SQLInstrumentationTests(TestCase):
+    def setUp(self):
+        collection = Collection.objects.create(title='Tools')
+        Product.objects.create(title='Saw', slug='saw', unit_price=5, inventory=1, collection=collection)
+
+    def queries(self, response):
+        self.assertEqual(response.status_code, 200)
+        return int(re.search(r'"(\d+) queries"', response['Server-Timing']).group(1))
+
+    async def test_asgi_counts_queries_run_in_worker_threads(self):
+        for path in ('/store/products/', '/store/async/products/', '/store/async/collections/'):
+            with self.subTest(path):
+                expected = await sync_to_async(lambda: self.queries(self.client.get(path)))()
+                self.assertGreater(expected, 0)
+                self.assertEqual(self.queries(await self.async_client.get(path)), expected)
+
+    async def test_concurrent_asgi_requests_count_only_their_own_queries(self):
+        products, collections = await asyncio.gather(
+            self.async_client.get('/store/async/products/'), self.async_client.get('/store/async/collections/'))
+        self.assertEqual((self.queries(products), self.queries(collections)), (2, 1))
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=None, CART_CACHE_TIMEOUT=None)
+class FastJSONRendererTests(TestCase):
+    def setUp(self):
+        collection = Collection.objects.create(title='Tööls ')
+        self.product = Product.objects.create(
+            title='Säw', slug='saw', description='Line\u2028break', unit_price='9999.99', inventory=1, collection=collection)
+        self.product.promotions.add(Promotion.objects.create(description='Spring', discount=0.15))
+        self.cheap = Product.objects.create(title='Pin', slug='pin', unit_price='0.01', inventory=1, collection=collection)
+        self.cart = Cart.objects.create()
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=self.product, quantity=3), CartItem(cart=self.cart, product=self.cheap, quantity=7)])
+        user = User.objects.create_user('ann', 'ann@example.com', 'secret')
+        place_order(self.order_cart(), Customer.objects.create(user=user, phone='1'))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def order_cart(self):
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        return cart.pk
+
+    def test_api_responses_match_json_renderer(self):
+        for path in ('/store/products/', f'/store/products/{self.product.pk}/', f'/store/carts/{self.cart.pk}/',
+                     '/store/orders/', '/store/collections/'):
+            with self.subTest(path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_special_values_match_json_renderer(self):
+        data = {
+            'prices': [Decimal('0.00001'), Decimal('-0'), Decimal('1E+20'), Decimal('123.45')],
+            'placed_at': [
+                timezone.now(), datetime(2024, 1, 1, 12, 30), datetime(2024, 7, 1, tzinfo=ZoneInfo('Europe/London'))],
+            'date': date(2024, 1, 1),
+            'id': uuid4(),
+            'label': gettext_lazy('Cart'),
+            1: 'non-string key',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 
 from rest_framework_nested import routers
@@ -11,6 +11,7 @@ router.register('products', views.ProductViewSet, basename='products')
 router.register('collections', views.CollectionViewSet)
 router.register('carts', views.CartViewSet)
 router.register('customers', views.CustomerViewSet)
+router.register('orders', views.OrderViewSet, basename='orders')
 
 #parent router, parent prefix, lookup parameter [product_pk]
 products_router = routers.NestedDefaultRouter(router, 'products',  lookup='product')
@@ -23,4 +24,15 @@ carts_router.register('items', views.CartItemViewSet, basename='cart-items')
 
 
 #summation
-urlpatterns = router.urls + products_router.urls  + carts_router.urls
\ No newline at end of file
+# async-native read endpoints (see store/async_views.py), meant to be served under ASGI
+async_urlpatterns = [
+    path('async/products/', async_views.product_list, name='async-products-list'),
+    path('async/products/<int:pk>/', async_views.product_detail, name='async-products-detail'),
+    path('async/collections/', async_views.collection_list, name='async-collections-list'),
+    path('async/collections/<int:pk>/', async_views.collection_detail, name='async-collections-detail'),
+    path('async/carts/<uuid:pk>/', async_views.cart_detail, name='async-carts-detail'),
+]
+
+urlpatterns = [
+    path('catalog-cache/stats/', views.CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
+] + async_urlpatterns + router.urls + products_router.urls  + carts_router.urls
\ No newline at end of file
@@ -1,24 +1,37 @@
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
-from rest_framework.decorators import api_view
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Product, Collection, OrderItem, Review, Cart, CartItem, Order, OrderItem, Customer
-from .serializers import ProductSerializer, CollectionSerializer, ReviewSerializer, CartSerializer, CartItemSerializer, CustomerSerializer
+from .serializers import ProductSerializer, CollectionSerializer, ReviewSerializer, CartSerializer, CartItemSerializer, AddCartItemSerializer, BulkCartItemSerializer, CustomerSerializer, OrderSerializer, CreateOrderSerializer
 from rest_framework.views import APIView
-from django.db.models import Count
 
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, CreateModelMixin, DestroyModelMixin, UpdateModelMixin
 from rest_framework.viewsets import ModelViewSet, GenericViewSet
 
 from django_filters.rest_framework import DjangoFilterBackend
 from store.filters import ProductFilter
+from store.search import ProductSearchFilter
 
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
 #from rest_framework.pagination import PageNumberPagination
 
-from .pagination import DefaultPagination
+from .pagination import DefaultPagination, KeysetPagination
+from .carts import carts_with_totals, cart_items_queryset, cart_cache_key, cart_cache_timeout, upsert_cart_items, MAX_QUANTITY, QuantityLimitExceeded
+from django.core.cache import cache
+from .caching import CatalogCacheMixin, catalog_cache_stats
+from .conditional import ConditionalGetMixin
+from .fieldsets import FIELDS_PARAM, OMIT_PARAM, SparseQuerysetMixin
+from .compiled import CompiledReadMixin
+from .replicas import ReplicaReadMixin
+from .export import EXPORT_FORMATS, export_response
+from .importer import IMPORT_FORMATS, import_products
+from rest_framework.parsers import MultiPartParser
+from io import TextIOWrapper
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
 
 class CustomerViewSet(CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, GenericViewSet):
@@ -27,15 +40,27 @@ class CustomerViewSet(CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, Ge
 
 
     
-class ProductViewSet(ModelViewSet):
-    queryset = Product.objects.all()
+class ProductViewSet(ReplicaReadMixin, ConditionalGetMixin, CatalogCacheMixin, SparseQuerysetMixin, CompiledReadMixin, ModelViewSet):
+    queryset = Product.objects.defer('search_vector')
+    compiled_read = True
+    volatile_fields = ('inventory',)
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     #filterset_fields = ['collection_id', 'unit_price']
     filterset_class = ProductFilter
     pagination_class = DefaultPagination
     search_fields = ['title', 'description']
-    ordering_fields = ['unit_price', 'last_update']
+    ordering_fields = ['unit_price', 'effective_price', 'last_update', 'reviews_count']
+
+    @property
+    def paginator(self):
+        # ?cursor=... switches to keyset pagination; plain ?page=N keeps working
+        if not hasattr(self, '_paginator'):
+            if KeysetPagination.cursor_query_param in self.request.query_params:
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     # def get_queryset(self):
     #     queryset = Product.objects.all()
@@ -48,6 +73,29 @@ class ProductViewSet(ModelViewSet):
 
     def get_serializer_context(self):
         return {'request': self.request}
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):   # GET /store/products/export/?export_format=csv|ndjson (+ the usual filters, search, ordering)
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"export_format must be one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        asynchronous = isinstance(request._request, ASGIRequest)
+        return export_response(self.filter_queryset(self.get_queryset()), export_format, asynchronous)
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):   # POST /store/products/import/  multipart: file=<csv|ndjson>, import_format=csv|ndjson
+        upload = request.FILES.get('file')
+        import_format = request.data.get('import_format', 'csv')
+        if upload is None or import_format not in IMPORT_FORMATS:
+            return Response(
+                {'error': f"Upload a 'file' and set import_format to one of: {', '.join(IMPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stats = import_products(TextIOWrapper(upload.file, encoding='utf-8', newline=''), import_format)   #newline='' as csv requires
+        return Response(stats.as_dict())
     
     def destroy(self, request, *args, **kwargs):
         product = get_object_or_404(Product, pk=kwargs['pk'])
@@ -58,8 +106,9 @@ class ProductViewSet(ModelViewSet):
             )
         return super().destroy(request, *args, **kwargs)                         
     
-class CollectionViewSet(ModelViewSet):
-    queryset = Collection.objects.annotate( products_count=Count('products') ).all()
+class CollectionViewSet(ReplicaReadMixin, ConditionalGetMixin, CatalogCacheMixin, SparseQuerysetMixin, CompiledReadMixin, ModelViewSet):
+    queryset = Collection.objects.all()
+    compiled_read = True
     serializer_class = CollectionSerializer
 
     def get_serializer_context(self):
@@ -75,42 +124,129 @@ class CollectionViewSet(ModelViewSet):
         return super().destroy(request, *args, **kwargs)
     
 
-class ReviewViewSet(ModelViewSet):
+class CatalogCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(catalog_cache_stats())
+
+
+class ReviewViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, CompiledReadMixin, ModelViewSet):
     #queryset = Review.objects.all()
+    compiled_read = True
     serializer_class = ReviewSerializer
 
     def get_queryset(self):
         return Review.objects.filter(product_id=self.kwargs['product_pk'])
 
     def get_serializer_context(self):
-        return {'product_id': self.kwargs['product_pk']}   #pass this dictionary to serializer
+        return {'product_id': self.kwargs['product_pk'], 'request': self.request}   #pass this dictionary to serializer
     
 
 class CartViewSet(CreateModelMixin, 
                   RetrieveModelMixin, 
                   DestroyModelMixin,
                   GenericViewSet):
-    queryset = Cart.objects.prefetch_related('items__product').all()
+    queryset = carts_with_totals()
     serializer_class = CartSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        timeout = cart_cache_timeout()
+        key = cart_cache_key(kwargs['pk'])
+        sparse = FIELDS_PARAM in request.query_params or OMIT_PARAM in request.query_params
+        if not timeout or key is None or sparse:   #the cache only holds the full representation
+            return super().retrieve(request, *args, **kwargs)
+
+        data = cache.get(key)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            cache.set(key, data, timeout)
+        return Response(data)
+
 
 
 class CartItemViewSet(ModelViewSet):
     #serializer_class = CartItemSerializer
     http_method_names = ['get', 'post', 'path', 'delete']
+    bulk_max_items = 500
    
     def get_queryset(self):    # take data from database 
-        return CartItem.objects.filter(cart_id=self.kwargs['cart_pk']).select_related('product')
+        return cart_items_queryset().filter(cart_id=self.kwargs['cart_pk'])
 
     
     def get_serializer_class(self): #define serializer 
         if self.request.method == 'POST':
-            return CartItemSerializer
+            return AddCartItemSerializer
         return CartItemSerializer
     
     def get_serializer_context(self):  #pass data to seriazer (like url query paramas)
         return {'cart_id' : self.kwargs['cart_pk']}
-    
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, cart_pk=None):   # POST /store/carts/[cart_pk]/items/bulk/  body: [{product_id, quantity}, ...]
+        cart = get_object_or_404(Cart, pk=cart_pk)
+        rows = request.data
+        if not isinstance(rows, list) or len(rows) > self.bulk_max_items:
+            return Response(
+                {'error': f'Expected a list of at most {self.bulk_max_items} items.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors, valid = [], []
+        for index, row in enumerate(rows):
+            serializer = BulkCartItemSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        known = set(Product.objects.filter(pk__in={row['product_id'] for _, row in valid}).values_list('pk', flat=True))
+        quantities = {}
+        for index, row in valid:
+            if row['product_id'] not in known:
+                errors.append({'index': index, 'errors': {'product_id': ['No product with the given ID was found.']}})
+                continue
+            quantities[row['product_id']] = quantities.get(row['product_id'], 0) + row['quantity']
+
+        try:
+            upsert_cart_items(cart.pk, quantities)
+        except QuantityLimitExceeded as error:   #nothing was written; report every row of the offending products
+            over = set(error.product_ids)
+            errors = [
+                {'index': index, 'errors': {'quantity': [f'The cart can hold at most {MAX_QUANTITY} of this product.']}}
+                for index, row in valid if row['product_id'] in over
+            ]
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors.sort(key=lambda error: error['index'])
+        return Response(
+            {'cart': CartSerializer(carts_with_totals().get(pk=cart.pk)).data, 'errors': errors},
+            status=status.HTTP_200_OK if quantities or not errors else status.HTTP_400_BAD_REQUEST
+        )
+
+
+class OrderViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Order.objects.filter(customer__user_id=self.request.user.id) \
+            .prefetch_related('orderitem_set__product').order_by('-placed_at')
+
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return CreateOrderSerializer
+        return OrderSerializer
+
+    def create(self, request, *args, **kwargs):
+        customer = Customer.objects.filter(user_id=request.user.id).first()
+        if customer is None:
+            return Response({'error': 'Create a customer profile before checking out.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = CreateOrderSerializer(data=request.data, context={'customer': customer})
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        order = self.get_queryset().get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
 
     
 #==============================================================================================================================
@@ -148,3 +284,4 @@ class CartItemViewSet(ModelViewSet):
 
 
     
+